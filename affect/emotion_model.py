@@ -1,14 +1,22 @@
-from transformers import pipeline
+from config import INFERENCE_BACKEND
+
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
 
 class EmotionDetector:
-    def __init__(self):
+    def __init__(self, backend=INFERENCE_BACKEND):
         print("[APU] Loading emotion model... (first time may take a while)")
-        self.model = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            return_all_scores=True
-        )
-        print("[APU] Emotion model loaded.")
+        if backend == "onnx":
+            from core.onnx_backend import OnnxTextClassifier
+            self.model = OnnxTextClassifier()
+        else:
+            from transformers import pipeline
+            self.model = pipeline(
+                "text-classification",
+                model=EMOTION_MODEL_NAME,
+                return_all_scores=True
+            )
+        print(f"[APU] Emotion model loaded ({backend}).")
 
     def detect(self, text):
         scores = self.model(text)[0]
@@ -1,19 +1,17 @@
-def coach_agent(state, llm):
-    rag = state.get("rag_context", "")
-
-    user = f"""
-You are a motivational coach grounded in retrieved knowledge.
-Use supportive, autonomy-supportive language (SDT). Avoid medical claims.
-
-{rag}
+from agents.prompting import build_messages
+from config import COACH_NUM_PREDICT
 
-Student message:
-{state["user_input"]}
-""".strip()
 
-    text = llm.chat(
-        system="You are an empathetic motivational coach. Support autonomy, competence, and relatedness.",
-        user=user,
-        temperature=0.7
+def coach_agent(state, llm):
+    messages = build_messages(
+        state,
+        role="You are an empathetic motivational coach. Support autonomy, competence, and relatedness.",
+        instructions=(
+            "Stay grounded in the retrieved knowledge above.\n"
+            "Use supportive, autonomy-supportive language (SDT). Avoid medical claims."
+        ),
+        user_label="Student message",
     )
+
+    text = llm.chat_messages(messages, temperature=0.7, num_predict=COACH_NUM_PREDICT)
     return {"coach_response": text}
@@ -1,19 +1,17 @@
-def critic_agent(state, llm):
-    rag = state.get("rag_context", "")
-
-    user = f"""
-Check safety and ethics risks. If user suggests self-harm, crisis, or severe distress, flag it clearly.
-Use the retrieved context only as reference.
-
-{rag}
+from agents.prompting import build_messages
+from config import CRITIC_NUM_PREDICT
 
-User message:
-{state["user_input"]}
-""".strip()
 
-    text = llm.chat(
-        system="You are a safety and ethics monitor for an educational tutor.",
-        user=user,
-        temperature=0.2
+def critic_agent(state, llm):
+    messages = build_messages(
+        state,
+        role="You are a safety and ethics monitor for an educational tutor.",
+        instructions=(
+            "Check safety and ethics risks. If user suggests self-harm, crisis, or severe distress, flag it clearly.\n"
+            "Use the retrieved context above only as reference."
+        ),
+        user_label="User message",
     )
+
+    text = llm.chat_messages(messages, temperature=0.2, num_predict=CRITIC_NUM_PREDICT)
     return {"critic_response": text}
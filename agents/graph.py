@@ -5,6 +5,7 @@ from agents.tutor_agent import tutor_agent
 from agents.coach_agent import coach_agent
 from agents.critic_agent import critic_agent
 from agents.parliament import parliament_node
+from agents.routing import RoutingPolicy, RoutingMetrics, AGENT_NODES
 from core.llm_client import LLMClient
 from analystics.feature_extractor import FeatureExtractorLLM
 from core.llm_client import LLMClient
@@ -16,13 +17,24 @@ fx = FeatureExtractorLLM(llm_client=llm, max_retries=2)
 risk_model = RiskModelLLM(feature_extractor=fx)
 
 
-def build_graph(memory):
-    llm = LLMClient()
+def build_graph(memory, policy=None, metrics=None, llm=None):
+    llm = llm or LLMClient()
     emotion_detector = EmotionDetector()
+    policy = policy or RoutingPolicy()
+    metrics = metrics if metrics is not None else RoutingMetrics()
 
     def affective_node(state):
         emotion = emotion_detector.detect(state["user_input"])
-        return {"emotion": emotion}
+        route = policy.select(emotion)
+        metrics.record(route)
+        return {
+            "emotion": emotion,
+            "pre_risk": policy.pre_risk(emotion),
+            "route": route,
+        }
+
+    def route_agents(state):
+        return state.get("route") or ["tutor"]
 
     def risk_node(state):
         res = risk_model.predict(state)
@@ -46,12 +58,10 @@ def build_graph(memory):
 
     graph.set_entry_point("rag")
 
-    # RAG 先执行，再做情绪，再并行
+    # RAG 先执行，再做情绪，再按 routing policy 并行（只跑需要的 agent）
     graph.add_edge("rag", "affect")
 
-    graph.add_edge("affect", "tutor")
-    graph.add_edge("affect", "coach")
-    graph.add_edge("affect", "critic")
+    graph.add_conditional_edges("affect", route_agents, list(AGENT_NODES))
 
     graph.add_edge("tutor", "parliament")
     graph.add_edge("coach", "parliament")
@@ -1,13 +1,20 @@
-def parliament_node(state):
-    return {
-        "final_response": f"""
-[TUTOR – Competence]
-{state.get('tutor_response', '')}
+SECTIONS = (
+    ("tutor_response", "[TUTOR – Competence]"),
+    ("coach_response", "[COACH – Relatedness]"),
+    ("critic_response", "[CRITIC – Safety]"),
+)
+
 
-[COACH – Relatedness]
-{state.get('coach_response', '')}
+def parliament_node(state):
+    # routing may skip coach / critic; only show the agents that actually ran
+    route = state.get("route") or []
+    parts = []
+    for key, header in SECTIONS:
+        text = state.get(key)
+        if text:
+            parts.append(f"{header}\n{text}")
+        elif key.split("_")[0] in route:
+            # the agent ran but returned nothing (e.g. cut off by num_predict): say so
+            parts.append(f"{header}\n(no response)")
 
-[CRITIC – Safety]
-{state.get('critic_response', '')}
-""".strip()
-    }
+    return {"final_response": "\n\n".join(parts).strip()}
@@ -0,0 +1,34 @@
+from typing import Dict, Any, List
+
+# Shared, byte-identical prefix for every agent call in a turn.
+# Ollama (llama.cpp) reuses the KV cache for the longest common token prefix,
+# so the evidence block is only evaluated once per turn instead of once per agent.
+# Keep this text stable: any change here invalidates the cached prefix.
+SHARED_SYSTEM = (
+    "You are part of a local tutoring team for machine learning beginners.\n"
+    "The team has three roles: an academic tutor, a motivational coach, and a safety critic.\n"
+    "All roles share the retrieved evidence below. Do not invent facts beyond it."
+)
+
+
+def shared_prefix(state: Dict[str, Any]) -> str:
+    rag = state.get("rag_context", "") or "(no retrieved evidence)"
+    prefix = f"{SHARED_SYSTEM}\n\n{rag}"
+    history = state.get("history_context", "")
+    if history:
+        prefix += f"\n\n# Conversation memory\n{history}"
+    return prefix
+
+
+def build_messages(state: Dict[str, Any], role: str, instructions: str, user_label: str) -> List[Dict[str, str]]:
+    """
+    Layout (common prefix first, role-specific tail last):
+      1. system: SHARED_SYSTEM + rag_context (+ history_context)   <- identical across tutor / coach / critic
+      2. system: role + instructions           <- differs per agent
+      3. user:   student message
+    """
+    return [
+        {"role": "system", "content": shared_prefix(state)},
+        {"role": "system", "content": f"{role}\n{instructions}".strip()},
+        {"role": "user", "content": f"{user_label}:\n{state['user_input']}"},
+    ]
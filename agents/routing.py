@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Any, List
+
+from config import (
+    ROUTE_COACH_DISTRESS,
+    ROUTE_CRITIC_PRE_RISK,
+    ROUTE_ALWAYS_ALL,
+)
+
+AGENT_NODES = ("tutor", "coach", "critic")
+
+
+@dataclass
+class RoutingPolicy:
+    """
+    Decides which agents run for a turn, based on the `affect` output only.
+    Cheap signals, no LLM call:
+      - distress: max(sadness, fear) from the emotion classifier
+      - pre_risk: 0.55*sadness + 0.45*fear + 0.20*anger, clamped to [0, 1].
+        The sadness/fear part matches RiskModelLLM's affect term; anger is extra,
+        so hostile messages also get a critic pass.
+
+    The critic is skipped whenever this reads low (e.g. a neutral-sounding message),
+    even if RiskModelLLM later scores the turn high. The risk model and escalation
+    still run on every turn; only the critic's review text is missing.
+    """
+    coach_distress: float = ROUTE_COACH_DISTRESS
+    critic_pre_risk: float = ROUTE_CRITIC_PRE_RISK
+    always_all: bool = ROUTE_ALWAYS_ALL
+
+    @staticmethod
+    def distress(emotion: Dict[str, float]) -> float:
+        return max(emotion.get("sadness", 0.0), emotion.get("fear", 0.0))
+
+    @staticmethod
+    def pre_risk(emotion: Dict[str, float]) -> float:
+        score = (
+            0.55 * emotion.get("sadness", 0.0)
+            + 0.45 * emotion.get("fear", 0.0)
+            + 0.20 * emotion.get("anger", 0.0)
+        )
+        return max(0.0, min(1.0, score))
+
+    def select(self, emotion: Dict[str, float]) -> List[str]:
+        if self.always_all:
+            return list(AGENT_NODES)
+
+        route = ["tutor"]
+        if self.distress(emotion) >= self.coach_distress:
+            route.append("coach")
+        if self.pre_risk(emotion) >= self.critic_pre_risk:
+            route.append("critic")
+        return route
+
+
+class RoutingMetrics:
+    """
+    Counts agent LLM calls per turn vs. the always-run-all baseline.
+    Shared across graph invocations, so it is lock-protected.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.turns = 0
+        self.llm_calls = 0
+        self.llm_calls_saved = 0
+        self.route_counts: Dict[str, int] = {}
+
+    def record(self, route: List[str]):
+        with self._lock:
+            self.turns += 1
+            self.llm_calls += len(route)
+            self.llm_calls_saved += len(AGENT_NODES) - len(route)
+            key = "+".join(route)
+            self.route_counts[key] = self.route_counts.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            baseline = self.turns * len(AGENT_NODES)
+            return {
+                "turns": self.turns,
+                "llm_calls": self.llm_calls,
+                "llm_calls_saved": self.llm_calls_saved,
+                "calls_per_turn": (self.llm_calls / self.turns) if self.turns else 0.0,
+                "saved_ratio": (self.llm_calls_saved / baseline) if baseline else 0.0,
+                "routes": dict(self.route_counts),
+            }
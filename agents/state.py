@@ -2,6 +2,10 @@ from typing import TypedDict, Dict, NotRequired, List, Any
 
 class TutorState(TypedDict):
     user_input: str
+    session_id: NotRequired[str]
+    # conversation memory (summary + relevant/recent turns), already within the token budget
+    history_context: NotRequired[str]
+
     rag_context: NotRequired[str]
     rag_evidence: NotRequired[Dict[str, Any]]
     rag_semantic: NotRequired[List[str]]
@@ -12,6 +16,10 @@ class TutorState(TypedDict):
 
     # affect
     emotion: NotRequired[Dict[str, float]]
+    pre_risk: NotRequired[float]
+
+    # routing: which agents run this turn
+    route: NotRequired[List[str]]
 
     # agents
     tutor_response: NotRequired[str]
@@ -1,19 +1,17 @@
-def tutor_agent(state, llm):
-    rag = state.get("rag_context", "")
-
-    user = f"""
-You MUST use the following retrieved knowledge as your primary grounding.
-If the knowledge is insufficient, say what is missing and ask one clarifying question.
-
-{rag}
+from agents.prompting import build_messages
+from config import TUTOR_NUM_PREDICT
 
-Student question:
-{state["user_input"]}
-""".strip()
 
-    text = llm.chat(
-        system="You are an academic tutor. Be precise, structured, and grounded in retrieved context.",
-        user=user,
-        temperature=0.4
+def tutor_agent(state, llm):
+    messages = build_messages(
+        state,
+        role="You are an academic tutor. Be precise, structured, and grounded in retrieved context.",
+        instructions=(
+            "You MUST use the retrieved knowledge above as your primary grounding.\n"
+            "If the knowledge is insufficient, say what is missing and ask one clarifying question."
+        ),
+        user_label="Student question",
     )
+
+    text = llm.chat_messages(messages, temperature=0.4, num_predict=TUTOR_NUM_PREDICT)
     return {"tutor_response": text}
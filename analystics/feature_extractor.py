@@ -7,6 +7,30 @@ import json
 import math
 
 
+def safe_json_load(text: str) -> Dict[str, Any]:
+    """
+    Attempt to parse JSON even if model adds stray text.
+    Shared by every LLM-JSON consumer (feature extraction, scripts/build_kg.py).
+    """
+    text = text.strip()
+    # try direct
+    try:
+        return json.loads(text)
+    except Exception:
+        pass
+
+    # salvage: extract first {...} block
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        candidate = text[start : end + 1]
+        try:
+            return json.loads(candidate)
+        except Exception:
+            return {}
+    return {}
+
+
 @dataclass
 class ExtractedFeatures:
     """
@@ -155,26 +179,7 @@ class FeatureExtractorLLM:
 
     @staticmethod
     def _safe_json_load(text: str) -> Dict[str, Any]:
-        """
-        Attempt to parse JSON even if model adds stray text.
-        """
-        text = text.strip()
-        # try direct
-        try:
-            return json.loads(text)
-        except Exception:
-            pass
-
-        # salvage: extract first {...} block
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            candidate = text[start : end + 1]
-            try:
-                return json.loads(candidate)
-            except Exception:
-                return {}
-        return {}
+        return safe_json_load(text)
 
     @staticmethod
     def _clamp01(x: Any) -> float:
@@ -1,5 +1,53 @@
 OLLAMA_MODEL = "qwen3:4b"
 OLLAMA_HOST = "http://localhost:11434"
 
+# Ollama runtime options (core/llm_client.py)
+OLLAMA_KEEP_ALIVE = "30m"     # keep the model loaded between turns
+OLLAMA_NUM_CTX = 8192         # keep constant across calls, otherwise Ollama reloads the model
+OLLAMA_HEARTBEAT_SEC = 240    # warm-model ping interval; 0 disables the heartbeat
+# qwen3 is a thinking model: its <think> block would count against num_predict and
+# cut coach/critic replies off inside the reasoning. Keep False unless limits are raised.
+OLLAMA_THINK = False
+
+# per-agent generation limits (num_predict, answer tokens only because OLLAMA_THINK = False)
+TUTOR_NUM_PREDICT = 768
+COACH_NUM_PREDICT = 320
+CRITIC_NUM_PREDICT = 256
+
 EMOTION_THRESHOLD = 0.4
-RISK_THRESHOLD = 0.8
+RISK_THRESHOLD = 0.8           # single escalation threshold (safety/escalation.EscalationPolicy)
+ESCALATE_ON_HIGH_LEVEL = True  # also escalate when the risk model says "high" below the threshold
+
+# Escalation queue (SQLite WAL, background writer)
+ESCALATION_DB = "safety_store/escalations.db"
+ESCALATION_BATCH_SIZE = 64     # rows per transaction
+ESCALATION_FLUSH_MS = 50       # max time a row waits in memory before commit + fsync
+
+# Adaptive routing (agents/routing.py)
+# tutor always runs; coach joins when max(sadness, fear) >= ROUTE_COACH_DISTRESS;
+# critic joins when the cheap pre-risk signal >= ROUTE_CRITIC_PRE_RISK.
+# Caveat: the critic is skipped whenever the emotion classifier reads neutral, even if the
+# LLM risk model (which runs after the agents) then scores the turn high. Risk scoring and
+# escalation are unaffected. Set ROUTE_ALWAYS_ALL = True if every turn needs a critic pass.
+ROUTE_COACH_DISTRESS = EMOTION_THRESHOLD
+ROUTE_CRITIC_PRE_RISK = 0.25
+ROUTE_ALWAYS_ALL = False   # True = old behaviour (tutor + coach + critic every turn)
+
+# CPU inference backend for the MiniLM embedder and the emotion classifier
+# "torch" = sentence-transformers / transformers pipeline; "onnx" = ONNX Runtime (core/onnx_backend.py)
+INFERENCE_BACKEND = "torch"
+ONNX_MODEL_DIR = "onnx_models"   # written by scripts/export_onnx.py
+ONNX_QUANTIZED = True            # use the dynamic int8 model
+ONNX_NUM_THREADS = 4             # intra-op threads per session
+
+# Conversation memory (memory/conversation.py); token counts are approximate (~4 chars/token)
+CONV_KEEP_RECENT = 4           # turns kept verbatim
+CONV_TOKEN_BUDGET = 1200       # max tokens of history added to each prompt
+CONV_SUMMARY_MAX_TOKENS = 300  # rolling summary cap
+CONV_RETRIEVE_K = 2            # older turns pulled back by embedding similarity
+CONV_TURN_MAX_TOKENS = 200     # cap per rendered turn
+CONV_ARCHIVE_MAX = 500         # embedded older turns kept per session (ring buffer)
+CONV_MAX_SESSIONS = 1000       # live sessions; least recently used are dropped beyond this
+CONV_SESSION_IDLE_SEC = 3600   # sessions idle longer than this are dropped (0 = never)
+CONV_PENDING_MAX = 32          # evicted turns waiting for the summarizer, per session; oldest dropped beyond this
+CONV_SUMMARY_DEFER_SEC = 2.0   # max wait for in-flight agent turns before a summary call goes out anyway
@@ -1,20 +1,142 @@
+import re
+import threading
 import requests
-from config import OLLAMA_MODEL, OLLAMA_HOST
+from config import (
+    OLLAMA_MODEL,
+    OLLAMA_HOST,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_NUM_CTX,
+    OLLAMA_HEARTBEAT_SEC,
+    OLLAMA_THINK,
+)
+
+_THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def strip_think(text):
+    """Drop reasoning that older Ollama versions inline into content (they ignore `think`)."""
+    text = _THINK_BLOCK.sub("", text or "")
+    # an unclosed block means generation stopped inside the reasoning
+    if "<think>" in text:
+        text = text.split("<think>", 1)[0]
+    return text.strip()
+
+
+class LLMStats:
+    """
+    Accumulates Ollama timing fields (all durations in nanoseconds, as returned by the API).
+    prompt_eval_duration is the one that shrinks when the KV-cache prefix is reused.
+    """
+    FIELDS = ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "load_duration")
 
-class LLMClient:
     def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.truncated = 0   # replies that hit num_predict (done_reason == "length")
+        self.totals = {k: 0 for k in self.FIELDS}
+        self.last = {}
+
+    def record(self, data):
+        last = {k: int(data.get(k, 0) or 0) for k in self.FIELDS}
+        with self._lock:
+            self.calls += 1
+            if data.get("done_reason") == "length":
+                self.truncated += 1
+            for k, v in last.items():
+                self.totals[k] += v
+            self.last = last
+
+    def snapshot(self):
+        with self._lock:
+            n = self.calls or 1
+            return {
+                "calls": self.calls,
+                "truncated": self.truncated,
+                "totals": dict(self.totals),
+                "mean_prompt_eval_ms": self.totals["prompt_eval_duration"] / n / 1e6,
+                "mean_prompt_eval_count": self.totals["prompt_eval_count"] / n,
+                "last": dict(self.last),
+            }
+
+
+class LLMClient:
+    def __init__(self, keep_alive=OLLAMA_KEEP_ALIVE, num_ctx=OLLAMA_NUM_CTX):
         self.model = OLLAMA_MODEL
         self.host = OLLAMA_HOST
+        # num_ctx must be the same on every call: a different value makes Ollama reload the model
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.stats = LLMStats()
 
-    def chat(self, system, user, temperature=0.5):
-        payload = {
-            "model": self.model,
-            "messages": [
+    def chat(self, system, user, temperature=0.5, **options):
+        return self.chat_messages(
+            [
                 {"role": "system", "content": system},
                 {"role": "user", "content": user}
             ],
+            temperature=temperature,
+            **options
+        )
+
+    def chat_messages(self, messages, temperature=0.5, num_predict=None, num_ctx=None, keep_alive=None):
+        options = {"temperature": temperature, "num_ctx": num_ctx or self.num_ctx}
+        if num_predict is not None:
+            options["num_predict"] = num_predict
+
+        payload = {
+            "model": self.model,
+            "messages": messages,
             "stream": False,
-            "options": {"temperature": temperature}
+            "keep_alive": keep_alive if keep_alive is not None else self.keep_alive,
+            "think": OLLAMA_THINK,
+            "options": options
         }
         r = requests.post(f"{self.host}/api/chat", json=payload)
-        return r.json()["message"]["content"]
+        data = r.json()
+        self.stats.record(data)
+        return strip_think(data["message"]["content"])
+
+    def warm(self):
+        # empty prompt = load the model (or refresh its keep_alive timer) without generating
+        payload = {
+            "model": self.model,
+            "prompt": "",
+            "keep_alive": self.keep_alive,
+            "options": {"num_ctx": self.num_ctx},
+        }
+        r = requests.post(f"{self.host}/api/generate", json=payload, timeout=120)
+        return r.status_code == 200
+
+
+class ModelHeartbeat:
+    """
+    Background thread that pings the model every `interval` seconds so it stays resident
+    between turns (keep_alive alone expires if the student pauses longer than its window).
+    """
+
+    def __init__(self, client, interval=OLLAMA_HEARTBEAT_SEC):
+        self.client = client
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="ollama-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.client.warm()
+            except requests.RequestException:
+                pass  # Ollama not up yet; try again next beat
+            self._stop.wait(self.interval)
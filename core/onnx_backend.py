@@ -0,0 +1,175 @@
+"""
+Optional ONNX Runtime backend for the two CPU encoders:
+  - sentence embeddings (all-MiniLM-L6-v2)   -> OnnxSentenceEncoder
+  - emotion classifier (distilroberta)        -> OnnxTextClassifier
+
+Models are exported once with scripts/export_onnx.py (fp32 + dynamic int8).
+onnxruntime is only imported when this backend is used.
+"""
+from pathlib import Path
+from typing import Dict, List, Union
+import json
+
+import numpy as np
+
+from config import ONNX_MODEL_DIR, ONNX_NUM_THREADS, ONNX_QUANTIZED
+
+EMBED_HF_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIR_NAME = "minilm"
+EMBED_MAX_LEN = 256          # SentenceTransformer max_seq_length for all-MiniLM-L6-v2
+
+EMOTION_HF_NAME = "j-hartmann/emotion-english-distilroberta-base"
+EMOTION_DIR_NAME = "emotion"
+EMOTION_MAX_LEN = 512
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+
+def _require_ort():
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError(
+            "INFERENCE_BACKEND='onnx' needs onnxruntime. Install it with: pip install onnxruntime"
+        ) from e
+    return ort
+
+
+def _session(path: Path, num_threads: int):
+    ort = _require_ort()
+    if not path.exists():
+        raise FileNotFoundError(f"ONNX model not found: {path} (run scripts/export_onnx.py first)")
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = num_threads
+    opts.inter_op_num_threads = 1
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+def _model_path(model_dir: Path, quantized: bool) -> Path:
+    return model_dir / (INT8_FILE if quantized else FP32_FILE)
+
+
+class _OnnxEncoderBase:
+    def __init__(self, model_dir: Path, max_len: int, quantized: bool, num_threads: int):
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        self.max_len = max_len
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.session = _session(_model_path(self.model_dir, quantized), num_threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _run(self, texts: List[str]):
+        enc = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_len,
+            return_tensors="np",
+        )
+        feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feeds)[0], feeds["attention_mask"]
+
+
+class OnnxSentenceEncoder(_OnnxEncoderBase):
+    """
+    Drop-in for SentenceTransformer("all-MiniLM-L6-v2").encode:
+    mean pooling over tokens + L2 normalize (the model's own Pooling + Normalize modules).
+    """
+
+    def __init__(self, model_dir: Union[str, Path] = None, *, quantized: bool = ONNX_QUANTIZED,
+                 num_threads: int = ONNX_NUM_THREADS):
+        model_dir = model_dir or Path(ONNX_MODEL_DIR) / EMBED_DIR_NAME
+        super().__init__(model_dir, EMBED_MAX_LEN, quantized, num_threads)
+        cfg = json.loads((self.model_dir / "config.json").read_text(encoding="utf-8"))
+        self.dim = int(cfg["hidden_size"])   # mean pooling keeps the hidden size
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = True, **_):
+        if isinstance(texts, str):
+            texts = [texts]
+        out = []
+        for i in range(0, len(texts), batch_size):
+            hidden, mask = self._run(list(texts[i: i + batch_size]))
+            m = mask[..., None].astype(np.float32)
+            emb = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out.append(emb.astype(np.float32))
+        return np.concatenate(out, axis=0) if out else np.zeros((0, self.dim), dtype=np.float32)
+
+
+class OnnxTextClassifier(_OnnxEncoderBase):
+    """
+    Drop-in for pipeline("text-classification", return_all_scores=True):
+    calling it returns [[{"label": ..., "score": ...}, ...]] per input text.
+    """
+
+    def __init__(self, model_dir: Union[str, Path] = None, *, quantized: bool = ONNX_QUANTIZED,
+                 num_threads: int = ONNX_NUM_THREADS):
+        model_dir = model_dir or Path(ONNX_MODEL_DIR) / EMOTION_DIR_NAME
+        super().__init__(model_dir, EMOTION_MAX_LEN, quantized, num_threads)
+        cfg = json.loads((self.model_dir / "config.json").read_text(encoding="utf-8"))
+        self.id2label: Dict[int, str] = {int(k): v for k, v in cfg["id2label"].items()}
+
+    def __call__(self, texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        logits, _ = self._run(list(texts))
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return [
+            [{"label": self.id2label[j], "score": float(p[j])} for j in range(p.shape[0])]
+            for p in probs
+        ]
+
+
+def export_model(hf_name: str, out_dir: Union[str, Path], *, classifier: bool, quantize: bool = True,
+                 opset: int = 14) -> Dict[str, Path]:
+    """
+    Export a HF model to ONNX (fp32) and, optionally, a dynamic int8 copy (weights int8,
+    activations quantized at runtime; no calibration data needed).
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tok = AutoTokenizer.from_pretrained(hf_name)
+    cls = AutoModelForSequenceClassification if classifier else AutoModel
+    model = cls.from_pretrained(hf_name).eval()
+    model.config.return_dict = False
+
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in tok.model_input_names]
+    sample = tok(["a short sample sentence", "another one"], padding=True, return_tensors="pt")
+    output_name = "logits" if classifier else "last_hidden_state"
+    dynamic_axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic_axes[output_name] = {0: "batch"} if classifier else {0: "batch", 1: "seq"}
+
+    fp32_path = out_dir / FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    tok.save_pretrained(str(out_dir))
+    model.config.save_pretrained(str(out_dir))
+
+    paths = {"fp32": fp32_path}
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = out_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        paths["int8"] = int8_path
+    return paths
@@ -1,53 +1,95 @@
 # core/orchestrator.py
 from pathlib import Path
 
-from agents.graph import build_graph
+from agents.graph import build_graph, llm as risk_llm
+from agents.routing import RoutingPolicy, RoutingMetrics
+from core.llm_client import LLMClient, ModelHeartbeat
 from safety.escalation import HumanEscalation
-from config import RISK_THRESHOLD
 
 from memory.vector_store import VectorStore
+from memory.sharded_store import ShardedVectorStore
 from memory.knowledge_graph import KnowledgeGraph
 from memory.hybrid_memory import HybridMemory
+from memory.conversation import ConversationManager, approx_tokens
 
 
 class TutorOrchestrator:
-    def __init__(self, kb_store_dir: str = "kb_store"):
-        # 1) Load Vector KB
+    def __init__(self, kb_store_dir: str = "kb_store", routing_policy: RoutingPolicy = None):
+        # 1) Load Vector KB (sharded layout if build_vector_kb.py was run with NUM_SHARDS > 1)
         kb_store = Path(kb_store_dir)
         index_path = kb_store / "vector.index"
         texts_path = kb_store / "vector_texts.jsonl"
+        manifest_path = kb_store / "shards" / "manifest.json"
 
-        if not index_path.exists() or not texts_path.exists():
+        if manifest_path.exists():
+            vs = ShardedVectorStore.load(str(kb_store))
+        elif index_path.exists() and texts_path.exists():
+            vs = VectorStore.load(str(kb_store))
+        else:
             raise RuntimeError(
                 "Vector KB not built yet.\n"
-                f"Expected files: {index_path} and {texts_path}"
+                f"Expected files: {index_path} and {texts_path} (or {manifest_path})"
             )
+        self.vector_store = vs
 
-        vs = VectorStore.load(str(kb_store))
-
-        # 2) Optional KG
-        kg = KnowledgeGraph()
+        # 2) Optional KG (built offline by scripts/build_kg.py)
+        kg_path = kb_store / "kg.npz"
+        kg = KnowledgeGraph.load(kg_path) if kg_path.exists() else KnowledgeGraph()
 
         # 3) HybridMemory
         memory = HybridMemory(kg, vs)
 
-        # 4) Build LangGraph
-        self.app = build_graph(memory)
+        # 4) Build LangGraph (adaptive routing: skip agents the turn does not need)
+        self.llm = LLMClient()
+        self.routing_metrics = RoutingMetrics()
+        self.app = build_graph(memory, policy=routing_policy, metrics=self.routing_metrics, llm=self.llm)
+        # the risk model's feature extractor has its own module-level client in agents/graph.py;
+        # self.llm.stats covers the agents only
+        self.risk_llm = risk_llm
+
+        # keep the model resident between turns
+        self.heartbeat = ModelHeartbeat(self.llm).start()
 
-        # 5) Safety module
+        # 5) Safety module (threshold policy + durable escalation queue)
         self.hem = HumanEscalation()
 
-    def handle(self, user_input: str):
-        state = self.app.invoke({"user_input": user_input})
+        # 6) Conversation memory (per session; reuses the KB embedder, which is lock-guarded).
+        #    The summarizer gets its own client so its calls are not counted in self.llm.stats.
+        self.summary_llm = LLMClient()
+        self.conversations = ConversationManager(self.summary_llm, vs.model)
+
+    def handle(self, user_input: str, session_id: str = None):
+        # conversation memory only for identified sessions; anonymous calls never share history
+        inputs = {"user_input": user_input}
+        history = ""
+        if session_id is not None:
+            history = self.conversations.context(session_id, user_input)
+            inputs.update(session_id=session_id, history_context=history)
+
+        # no background summary while the agents share the KV-cached prefix
+        with self.conversations.turn():
+            state = self.app.invoke(inputs)
+
+        if session_id is not None:
+            self.conversations.record(session_id, user_input, state.get("final_response", ""))
 
         risk = state.get("risk_score", 0.0)
-        escalation = self.hem.check(risk) if risk > RISK_THRESHOLD else "OK"
+        escalation = self.hem.handle(state, session_id=session_id)
 
         return {
             "response": state.get("final_response", ""),
             "emotion": state.get("emotion", {}),
             "risk": risk,
             "escalation": escalation,
+            "route": state.get("route", []),
+            "history_tokens": approx_tokens(history),
             # debug: verify RAG really happened
             "rag_context": state.get("rag_context", ""),
         }
+
+    def close(self):
+        self.heartbeat.stop()
+        self.conversations.close()
+        self.hem.close()
+        if hasattr(self.vector_store, "close"):
+            self.vector_store.close()
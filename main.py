@@ -1,14 +1,21 @@
 from core.orchestrator import TutorOrchestrator
 
+# one interactive conversation per CLI run
+SESSION_ID = "cli"
+
 if __name__ == "__main__":
     tutor = TutorOrchestrator()
 
     while True:
         user_input = input("Student > ")
         if user_input.lower() in ["exit", "quit"]:
+            print("Routing stats:", tutor.routing_metrics.snapshot())
+            print("LLM stats (agents):", tutor.llm.stats.snapshot())
+            print("LLM stats (risk model):", tutor.risk_llm.stats.snapshot())
+            tutor.close()
             break
 
-        output = tutor.handle(user_input)
+        output = tutor.handle(user_input, session_id=SESSION_ID)
 
         print("\n[DEBUG] RAG Context:")
         print(output["rag_context"][:1200])
@@ -16,4 +23,5 @@ if __name__ == "__main__":
         print(output["response"])
         print("\nRisk Score:", output["risk"])
         print("Escalation:", output["escalation"])
+        print("Route:", " + ".join(output["route"]))
         print("-" * 50)
@@ -0,0 +1,351 @@
+"""
+Per-session conversation memory with a bounded prompt footprint.
+
+Each session keeps:
+  - the last `keep_recent` turns verbatim
+  - a rolling summary of everything older, updated incrementally in a background thread
+    (old summary + newly evicted turns -> new summary; never re-reads the whole history)
+  - embeddings of evicted turns, so relevant older turns can be pulled back by similarity
+
+`context(query)` renders all three into at most `budget_tokens` (approximate) tokens,
+so the prompt stops growing after the first few turns. Process memory is bounded too:
+the archive is a ring buffer of `archive_max` embedded turns, and the manager evicts
+idle sessions and caps the number of live sessions (LRU).
+"""
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock, Condition, Thread
+from typing import List, Optional
+import queue
+import time
+
+import numpy as np
+
+from config import (
+    CONV_KEEP_RECENT,
+    CONV_TOKEN_BUDGET,
+    CONV_SUMMARY_MAX_TOKENS,
+    CONV_RETRIEVE_K,
+    CONV_TURN_MAX_TOKENS,
+    CONV_ARCHIVE_MAX,
+    CONV_MAX_SESSIONS,
+    CONV_SESSION_IDLE_SEC,
+    CONV_PENDING_MAX,
+    CONV_SUMMARY_DEFER_SEC,
+)
+
+SUMMARY_SYSTEM = (
+    "You maintain a running summary of a tutoring conversation.\n"
+    "Keep what matters for future turns: topics covered, what the student understood or struggled with, "
+    "goals, and emotional state. No greetings, no advice. Plain text."
+)
+
+
+def approx_tokens(text: str) -> int:
+    # ~4 chars per token for English; good enough for budgeting, no tokenizer needed
+    return (len(text) + 3) // 4
+
+
+def clip_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    seq: int = 0
+
+    def render(self, max_tokens: int = CONV_TURN_MAX_TOKENS) -> str:
+        half = max(1, max_tokens // 2)
+        return f"Student: {clip_tokens(self.user, half)}\nTutor: {clip_tokens(self.assistant, half)}"
+
+
+@dataclass
+class ConversationMemory:
+    session_id: str
+    keep_recent: int = CONV_KEEP_RECENT
+    budget_tokens: int = CONV_TOKEN_BUDGET
+    retrieve_k: int = CONV_RETRIEVE_K
+    archive_max: int = CONV_ARCHIVE_MAX
+    pending_max: int = CONV_PENDING_MAX
+
+    recent: deque = field(default_factory=deque)
+    summary: str = ""
+    archive: List[Turn] = field(default_factory=list)
+    turns_total: int = 0
+
+    # evicted turns waiting for the background worker (summary fold + embedding)
+    _pending: List[Turn] = field(default_factory=list)
+    _queued: bool = False   # already in the manager's queue; one entry per session at most
+    dropped: int = 0        # evicted turns never summarized because the worker fell behind
+    _emb: Optional[np.ndarray] = None
+    _n_emb: int = 0
+    _head: int = 0      # next ring slot to overwrite once the archive is full
+    _lock: Lock = field(default_factory=Lock)
+
+    def add_turn(self, user: str, assistant: str) -> List[Turn]:
+        """Append a finished turn; returns the turns evicted from the verbatim window."""
+        evicted = []
+        with self._lock:
+            self.recent.append(Turn(user, assistant, seq=self.turns_total))
+            self.turns_total += 1
+            while len(self.recent) > self.keep_recent:
+                evicted.append(self.recent.popleft())
+            self._pending.extend(evicted)
+            overflow = len(self._pending) - self.pending_max
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+        return evicted
+
+    def mark_queued(self) -> bool:
+        """True if the caller should enqueue this session (it was not queued yet)."""
+        with self._lock:
+            if self._queued:
+                return False
+            self._queued = True
+            return True
+
+    def take_pending(self) -> List[Turn]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._queued = False   # turns evicted from now on need a new queue entry
+        return pending
+
+    def add_embeddings(self, turns: List[Turn], emb: np.ndarray):
+        """Store evicted turns for retrieval; once `archive_max` is reached the oldest slot is reused."""
+        if self.archive_max <= 0:
+            return
+        with self._lock:
+            for turn, vec in zip(turns, emb):
+                if self._emb is None:
+                    self._emb = np.zeros((min(16, self.archive_max), emb.shape[1]), dtype=np.float32)
+                if len(self.archive) < self.archive_max:
+                    if len(self.archive) == self._emb.shape[0]:
+                        grown = np.zeros((min(self._emb.shape[0] * 2, self.archive_max), self._emb.shape[1]),
+                                         dtype=np.float32)
+                        grown[: len(self.archive)] = self._emb
+                        self._emb = grown
+                    self._emb[len(self.archive)] = vec
+                    self.archive.append(turn)
+                else:
+                    self._emb[self._head] = vec
+                    self.archive[self._head] = turn
+                    self._head = (self._head + 1) % self.archive_max
+            self._n_emb = len(self.archive)
+
+    def relevant(self, q_emb: Optional[np.ndarray], k: int) -> List[Turn]:
+        with self._lock:
+            if q_emb is None or self._n_emb == 0 or k <= 0:
+                return []
+            sims = self._emb[: self._n_emb] @ q_emb.reshape(-1)
+            top = np.argsort(-sims)[:k]
+            return sorted((self.archive[i] for i in top.tolist()), key=lambda t: t.seq)
+
+    def context(self, q_emb: Optional[np.ndarray] = None) -> str:
+        """
+        Render memory into <= budget_tokens. Priority: recent turns (newest first) >
+        summary > retrieved older turns; whatever does not fit is dropped.
+        """
+        with self._lock:
+            recent = list(self.recent)
+            summary = self.summary
+        retrieved = self.relevant(q_emb, self.retrieve_k)
+
+        budget = self.budget_tokens
+        recent_lines: List[str] = []
+        for turn in reversed(recent):
+            text = turn.render()
+            cost = approx_tokens(text)
+            if cost > budget:
+                break
+            recent_lines.insert(0, text)
+            budget -= cost
+
+        summary_text = ""
+        if summary and budget > 0:
+            summary_text = clip_tokens(summary, min(budget, CONV_SUMMARY_MAX_TOKENS))
+            budget -= approx_tokens(summary_text)
+
+        retrieved_lines: List[str] = []
+        for turn in retrieved:
+            text = turn.render()
+            cost = approx_tokens(text)
+            if cost > budget:
+                break
+            retrieved_lines.append(text)
+            budget -= cost
+
+        parts = []
+        if summary_text:
+            parts.append("## Conversation so far (summary)\n" + summary_text)
+        if retrieved_lines:
+            parts.append("## Relevant earlier turns\n" + "\n\n".join(retrieved_lines))
+        if recent_lines:
+            parts.append("## Recent turns\n" + "\n\n".join(recent_lines))
+        return "\n\n".join(parts)
+
+
+class ConversationManager:
+    """
+    Owns all sessions plus one background worker that folds evicted turns into the
+    rolling summary and embeds them for retrieval. The request path only does a
+    deque append and (if there is an archive) one query embedding + a dot product.
+
+    `embedder` is called from the worker thread too; when it is shared with the vector
+    store, pass the LockedEmbedder from memory.vector_store.load_embedder (vs.model).
+
+    `llm` should be a dedicated LLMClient so summary calls stay out of the agents' stats.
+    Summaries are deferred while a turn is inside `with manager.turn():`, so they do not
+    interleave with a turn's agent calls and evict its shared prompt prefix from the KV cache.
+    The wait is bounded by `defer_sec`: with many sessions some turn is almost always in
+    flight, and an unbounded wait would stall the summarizer for good. Each session has
+    at most one queue entry and `pending_max` waiting turns.
+    """
+
+    def __init__(self, llm, embedder, *, keep_recent: int = CONV_KEEP_RECENT,
+                 budget_tokens: int = CONV_TOKEN_BUDGET, retrieve_k: int = CONV_RETRIEVE_K,
+                 archive_max: int = CONV_ARCHIVE_MAX, max_sessions: int = CONV_MAX_SESSIONS,
+                 idle_sec: float = CONV_SESSION_IDLE_SEC, pending_max: int = CONV_PENDING_MAX,
+                 defer_sec: float = CONV_SUMMARY_DEFER_SEC):
+        self.llm = llm
+        self.embedder = embedder
+        self.keep_recent = keep_recent
+        self.budget_tokens = budget_tokens
+        self.retrieve_k = retrieve_k
+        self.archive_max = archive_max
+        self.max_sessions = max_sessions
+        self.idle_sec = idle_sec
+        self.pending_max = pending_max
+        self.defer_sec = defer_sec
+
+        # least recently used first; value = (memory, last_used monotonic time)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._sessions_lock = Lock()
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._cv = Condition()
+        self._scheduled = 0
+        self._processed = 0
+        self._active_turns = 0
+        self._closing = False
+        self._idle = Condition()
+        self._thread = Thread(target=self._worker, name="conversation-summarizer", daemon=True)
+        self._thread.start()
+
+    def get(self, session_id: str) -> ConversationMemory:
+        now = time.monotonic()
+        with self._sessions_lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                mem = ConversationMemory(
+                    session_id,
+                    keep_recent=self.keep_recent,
+                    budget_tokens=self.budget_tokens,
+                    retrieve_k=self.retrieve_k,
+                    archive_max=self.archive_max,
+                    pending_max=self.pending_max,
+                )
+            else:
+                mem = entry[0]
+            self._sessions[session_id] = (mem, now)
+            self._evict(now)
+            return mem
+
+    def _evict(self, now: float):
+        # oldest entries first: drop idle sessions, then enforce the LRU cap
+        while self._sessions:
+            sid, (_, last_used) = next(iter(self._sessions.items()))
+            idle = self.idle_sec > 0 and now - last_used > self.idle_sec
+            if not idle and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[sid]
+
+    @property
+    def num_sessions(self) -> int:
+        with self._sessions_lock:
+            return len(self._sessions)
+
+    def context(self, session_id: str, query: str) -> str:
+        mem = self.get(session_id)
+        q_emb = None
+        if mem._n_emb and self.retrieve_k > 0:
+            q_emb = self._encode([query])[0]
+        return mem.context(q_emb)
+
+    def record(self, session_id: str, user: str, assistant: str):
+        mem = self.get(session_id)
+        if mem.add_turn(user, assistant) and mem.mark_queued():
+            with self._cv:
+                self._scheduled += 1
+            self._q.put(mem)
+
+    @contextmanager
+    def turn(self):
+        """Mark an agent turn in flight; the summarizer waits until none are."""
+        with self._idle:
+            self._active_turns += 1
+        try:
+            yield
+        finally:
+            with self._idle:
+                self._active_turns -= 1
+                self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all scheduled summary/embedding updates are done."""
+        with self._cv:
+            target = self._scheduled
+            return self._cv.wait_for(lambda: self._processed >= target, timeout=timeout)
+
+    def close(self):
+        with self._idle:
+            self._closing = True
+            self._idle.notify_all()
+        self._q.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        emb = np.asarray(self.embedder.encode(texts), dtype=np.float32)
+        return emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+
+    def _fold(self, summary: str, turns: List[Turn]) -> str:
+        new = "\n\n".join(t.render() for t in turns)
+        user = (
+            f"Current summary:\n{summary or '(empty)'}\n\n"
+            f"New turns:\n{new}\n\n"
+            f"Write the updated summary in at most {CONV_SUMMARY_MAX_TOKENS * 3 // 4} words."
+        )
+        # chat() disables thinking and strips <think>, so num_predict bounds the summary itself;
+        # an empty reply (e.g. cut off inside reasoning on an old server) keeps the old summary
+        text = self.llm.chat(system=SUMMARY_SYSTEM, user=user, temperature=0.2,
+                             num_predict=CONV_SUMMARY_MAX_TOKENS).strip()
+        if not text:
+            raise ValueError("empty summary reply")
+        return clip_tokens(text, CONV_SUMMARY_MAX_TOKENS)
+
+    def _worker(self):
+        while True:
+            mem = self._q.get()
+            if mem is None:
+                break
+            try:
+                turns = mem.take_pending()
+                if turns:
+                    mem.add_embeddings(turns, self._encode([f"{t.user}\n{t.assistant}" for t in turns]))
+                    with self._idle:
+                        self._idle.wait_for(lambda: self._active_turns == 0 or self._closing,
+                                            timeout=self.defer_sec)
+                    summary = self._fold(mem.summary, turns)
+                    with mem._lock:
+                        mem.summary = summary
+            except Exception as e:   # keep the old summary; the turns are still retrievable if embedded
+                print(f"[memory] summary update failed for {mem.session_id}: {e}")
+            finally:
+                with self._cv:
+                    self._processed += 1
+                    self._cv.notify_all()
@@ -5,8 +5,11 @@ class HybridMemory:
 
     def retrieve(self, query, concept=None, k=5, depth=2):
         semantic = self.vs.search(query, k=k)
-        structured_nodes = self.kg.query(concept, depth=depth) if concept else []
-        structured = [str(x) for x in structured_nodes]
+        if concept and hasattr(self.kg, "query_triplets"):
+            structured = [f"{h} --{r}--> {t}" for h, r, t in self.kg.query_triplets(concept, depth=depth, limit=3 * k)]
+        else:
+            structured_nodes = self.kg.query(concept, depth=depth) if concept else []
+            structured = [str(x) for x in structured_nodes]
         return {
             "semantic": semantic,
             "structured": structured
@@ -20,8 +23,10 @@ class HybridMemory:
             return []
 
         q = query.lower()
+        # inverted index narrows the scan to nodes that can score > 0
+        nodes = self.kg.candidate_nodes(q) if hasattr(self.kg, "candidate_nodes") else self.kg.nodes
         candidates = []
-        for n in self.kg.graph.nodes:
+        for n in nodes:
             name = str(n)
             score = 0
             if name.lower() in q:
@@ -1,14 +1,262 @@
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+import os
+
 import networkx as nx
+import numpy as np
+
+FORMAT_VERSION = 1
+_SEP = "\x00"
+
+
+def _blob(names: Sequence[str]) -> np.ndarray:
+    return np.frombuffer(_SEP.join(names).encode("utf-8"), dtype=np.uint8)
+
+
+def _unblob(blob: np.ndarray) -> List[str]:
+    if blob.size == 0:
+        return []
+    return blob.tobytes().decode("utf-8").split(_SEP)
+
+
+def _clean(name) -> str:
+    # the separator must never appear inside a name
+    return " ".join(str(name).replace(_SEP, " ").split())
+
 
 class KnowledgeGraph:
+    """
+    Directed labelled graph stored as integer arrays (CSR by head node).
+
+    - add_triplets(): bulk insert, each distinct name is interned once, rows become int32 id arrays
+    - save() / load(): uncompressed .npz of flat arrays, no pickle; names are decoded lazily
+    - graph: networkx view, built on demand for code that wants it
+    - candidate_nodes(): lazy token -> node inverted index for concept linking
+
+    Like nx.DiGraph, there is at most one edge per (head, tail); a later triplet replaces
+    the relation of an earlier one.
+    """
+
     def __init__(self):
-        self.graph = nx.DiGraph()
+        self._nodes: List[str] = []
+        self._node_ids = {}
+        self._relations: List[str] = []
+        self._rel_ids = {}
+
+        # CSR (edges sorted by head, then tail)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._tails = np.zeros(0, dtype=np.int32)
+        self._rels = np.zeros(0, dtype=np.int32)
 
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._lazy_names = None   # (node_blob, rel_blob) right after load()
+        self._graph = None
+        self._token_index = None  # lowercased name token -> node ids, built on first candidate_nodes()
+
+    # ---------- build ----------
     def add_triplet(self, head, relation, tail):
-        self.graph.add_edge(head, tail, relation=relation)
+        self.add_triplets([(head, relation, tail)])
+
+    def add_triplets(self, triplets: Iterable[Tuple[str, str, str]]):
+        triplets = list(triplets)
+        if not triplets:
+            return
+        self._ensure_names()
+        heads, rels, tails = zip(*triplets)
+        n_nodes = len(self._nodes)
+
+        # clean + intern each *distinct* raw name once (dict.fromkeys dedups in C),
+        # then map every row to ids in one pass; empty names map to -1 and are dropped
+        raw_nodes = dict.fromkeys(heads)
+        raw_nodes.update(dict.fromkeys(tails))
+        node_map = {raw: self._intern(_clean(raw), self._nodes, self._node_ids) for raw in raw_nodes}
+        rel_map = {raw: self._intern(_clean(raw), self._relations, self._rel_ids) for raw in dict.fromkeys(rels)}
+
+        n = len(triplets)
+        h_ids = np.fromiter(map(node_map.__getitem__, heads), dtype=np.int32, count=n)
+        t_ids = np.fromiter(map(node_map.__getitem__, tails), dtype=np.int32, count=n)
+        r_ids = np.fromiter(map(rel_map.__getitem__, rels), dtype=np.int32, count=n)
+
+        ok = (h_ids >= 0) & (t_ids >= 0) & (r_ids >= 0)
+        if not ok.all():
+            h_ids, t_ids, r_ids = h_ids[ok], t_ids[ok], r_ids[ok]
+        if h_ids.size:
+            self._pending.append((h_ids, t_ids, r_ids))
+            self._graph = None
+        if len(self._nodes) != n_nodes:
+            self._token_index = None
+
+    @staticmethod
+    def _intern(name, names, ids):
+        if not name:
+            return -1
+        i = ids.get(name)
+        if i is None:
+            i = len(names)
+            names.append(name)
+            ids[name] = i
+        return i
+
+    def _ensure_names(self):
+        if self._lazy_names is not None:
+            node_blob, rel_blob = self._lazy_names
+            self._lazy_names = None
+            self._nodes = _unblob(node_blob)
+            self._node_ids = {n: i for i, n in enumerate(self._nodes)}
+            self._relations = _unblob(rel_blob)
+            self._rel_ids = {n: i for i, n in enumerate(self._relations)}
+
+    def _num_nodes(self) -> int:
+        if self._lazy_names is not None:
+            return len(self._indptr) - 1
+        return len(self._nodes)
+
+    def _ensure_csr(self):
+        n = self._num_nodes()
+        if not self._pending and len(self._indptr) == n + 1:
+            return
+
+        old_heads = np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64), np.diff(self._indptr))
+        heads = np.concatenate([old_heads] + [p[0].astype(np.int64) for p in self._pending])
+        tails = np.concatenate([self._tails.astype(np.int64)] + [p[1].astype(np.int64) for p in self._pending])
+        rels = np.concatenate([self._rels] + [p[2] for p in self._pending])
+        self._pending = []
+
+        # dedup (head, tail), keep the last inserted relation; np.unique also sorts by key
+        key = heads * max(n, 1) + tails
+        _, first_in_rev = np.unique(key[::-1], return_index=True)
+        keep = len(key) - 1 - first_in_rev
+
+        heads, tails, rels = heads[keep], tails[keep], rels[keep]
+        self._indptr = np.concatenate([[0], np.cumsum(np.bincount(heads, minlength=n))]).astype(np.int64)
+        self._tails = tails.astype(np.int32)
+        self._rels = rels.astype(np.int32)
+
+    # ---------- query ----------
+    @property
+    def nodes(self) -> List[str]:
+        self._ensure_names()
+        return self._nodes
+
+    @property
+    def num_edges(self) -> int:
+        self._ensure_csr()
+        return len(self._tails)
+
+    def _bfs(self, node, depth):
+        """Returns (node ids in BFS order, traversed edges as (head, tail, rel) id arrays)."""
+        self._ensure_names()
+        self._ensure_csr()
+        start = self._node_ids.get(_clean(node))
+        if start is None:
+            return [], (np.zeros(0, np.int64),) * 3
+
+        visited = np.zeros(len(self._nodes), dtype=bool)
+        visited[start] = True
+        order = [np.array([start])]
+        frontier = order[0]
+        edges = []
+        for _ in range(depth):
+            starts, ends = self._indptr[frontier], self._indptr[frontier + 1]
+            lens = ends - starts
+            total = int(lens.sum())
+            if total == 0:
+                break
+            # flat positions of all out-edges of the frontier, without a Python loop
+            offs = np.repeat(starts - np.concatenate([[0], np.cumsum(lens)[:-1]]), lens) + np.arange(total)
+            edges.append((np.repeat(frontier, lens), self._tails[offs], self._rels[offs]))
+
+            nbrs = np.unique(self._tails[offs])
+            nbrs = nbrs[~visited[nbrs]]
+            if nbrs.size == 0:
+                break
+            visited[nbrs] = True
+            order.append(nbrs)
+            frontier = nbrs
+
+        if edges:
+            h, t, r = (np.concatenate(x) for x in zip(*edges))
+        else:
+            h = t = r = np.zeros(0, np.int64)
+        return np.concatenate(order).tolist(), (h, t, r)
+
+    def _ensure_token_index(self):
+        if self._token_index is None:
+            self._ensure_names()
+            index = {}
+            for i, name in enumerate(self._nodes):
+                for tok in set(name.lower().split()):
+                    index.setdefault(tok, []).append(i)
+            self._token_index = index
+        return self._token_index
+
+    def candidate_nodes(self, text: str) -> List[str]:
+        """
+        Nodes that share a token with `text` or may occur in it as a substring.
+        A name inside `text` has its first token inside one of text's tokens, so looking
+        up every substring of every text token finds it without scanning all nodes.
+        """
+        index = self._ensure_token_index()
+        ids = set()
+        for tok in set(text.lower().split()):
+            for i in range(len(tok)):
+                for j in range(i + 1, len(tok) + 1):
+                    hit = index.get(tok[i:j])
+                    if hit:
+                        ids.update(hit)
+        return [self._nodes[i] for i in ids]
 
     def query(self, node, depth=2):
-        results = set()
-        for target in nx.single_source_shortest_path(self.graph, node, cutoff=depth):
-            results.add(target)
-        return list(results)
+        ids, _ = self._bfs(node, depth)
+        return [self._nodes[i] for i in ids]
+
+    def query_triplets(self, node, depth=2, limit=None):
+        _, (h, t, r) = self._bfs(node, depth)
+        out = [(self._nodes[a], self._relations[c], self._nodes[b]) for a, b, c in zip(h.tolist(), t.tolist(), r.tolist())]
+        return out[:limit] if limit else out
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        if self._graph is None:
+            self._ensure_names()
+            self._ensure_csr()
+            g = nx.DiGraph()
+            g.add_nodes_from(self._nodes)
+            heads = np.repeat(np.arange(len(self._nodes)), np.diff(self._indptr))
+            g.add_edges_from(
+                (self._nodes[h], self._nodes[t], {"relation": self._relations[r]})
+                for h, t, r in zip(heads.tolist(), self._tails.tolist(), self._rels.tolist())
+            )
+            self._graph = g
+        return self._graph
+
+    # ---------- persistence ----------
+    def save(self, path):
+        self._ensure_names()
+        self._ensure_csr()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=np.array([FORMAT_VERSION]),
+                nodes=_blob(self._nodes),
+                relations=_blob(self._relations),
+                indptr=self._indptr,
+                tails=self._tails,
+                rels=self._rels,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        kg = cls()
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"][0]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported KG format version in {path}")
+            kg._indptr = data["indptr"]
+            kg._tails = data["tails"]
+            kg._rels = data["rels"]
+            kg._lazy_names = (data["nodes"], data["relations"])
+        return kg
@@ -0,0 +1,171 @@
+"""
+Sharded vector index: the KB is split into N independent FAISS shards, each owned
+by its own worker process, so KB size is bounded by total RAM (not one process)
+and a query scans all shards in parallel.
+
+Layout (written by scripts/build_vector_kb.py with NUM_SHARDS > 1):
+    <store>/shards/manifest.json
+    <store>/shards/shard_000/vector.index
+    <store>/shards/shard_000/vector_texts.jsonl
+    ...
+
+The parent process encodes the query once, scatters the embedding to every
+shard worker, gathers each shard's top-k and merges them into a global top-k.
+`search(query, k)` returns texts, same as VectorStore.search.
+"""
+from pathlib import Path
+from threading import Lock
+from typing import List, Tuple, Sequence
+import heapq
+import json
+import multiprocessing as mp
+import zlib
+
+import numpy as np
+
+from config import INFERENCE_BACKEND
+from memory.vector_store import load_embedder, read_texts
+
+MANIFEST = "manifest.json"
+SHARD_BY = ("hash", "source")
+
+
+def shard_for(chunk_id: int, source: str, num_shards: int, shard_by: str = "hash") -> int:
+    """
+    Stable shard assignment (crc32, not hash(), so it is the same across runs/processes).
+      hash:   spread chunks evenly
+      source: keep every chunk of one document/course in the same shard
+    """
+    if shard_by not in SHARD_BY:
+        raise ValueError(f"shard_by must be one of {SHARD_BY}, got {shard_by!r}")
+    key = str(chunk_id) if shard_by == "hash" else str(source)
+    return zlib.crc32(key.encode("utf-8")) % num_shards
+
+
+def shard_dir_name(i: int) -> str:
+    return f"shard_{i:03d}"
+
+
+def write_manifest(shards_root, num_shards: int, shard_by: str, dim: int):
+    shards_root = Path(shards_root)
+    shards_root.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "num_shards": num_shards,
+        "shard_by": shard_by,
+        "dim": dim,
+        "shards": [shard_dir_name(i) for i in range(num_shards)],
+    }
+    (shards_root / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _shard_worker(shard_dir: str, conn, omp_threads: int):
+    import faiss
+
+    try:
+        faiss.omp_set_num_threads(omp_threads)
+        index = faiss.read_index(str(Path(shard_dir) / "vector.index"))
+        texts = read_texts(Path(shard_dir) / "vector_texts.jsonl")
+    except Exception as e:   # report to the parent instead of dying with a bare EOF on its side
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        conn.close()
+        return
+    conn.send(("ready", index.ntotal))
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        q_emb, k = msg
+        dist, idx = index.search(q_emb, min(k, max(index.ntotal, 1)))
+        hits = [
+            [(float(d), texts[i]) for d, i in zip(drow, irow) if i >= 0]
+            for drow, irow in zip(dist, idx)
+        ]
+        conn.send(hits)
+    conn.close()
+
+
+class ShardedVectorStore:
+    def __init__(
+        self,
+        shard_dirs: Sequence[str],
+        *,
+        backend: str = INFERENCE_BACKEND,
+        omp_threads_per_shard: int = 1,
+        load_model: bool = True,
+    ):
+        self.shard_dirs = [str(d) for d in shard_dirs]
+        self.model = load_embedder(backend) if load_model else None
+        self._lock = Lock()
+
+        # spawn, not fork: FAISS/OpenMP and tokenizer threads are not fork-safe
+        ctx = mp.get_context("spawn")
+        self._conns = []
+        self._procs = []
+        for d in self.shard_dirs:
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=_shard_worker, args=(d, child, omp_threads_per_shard), daemon=True)
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+
+        self.shard_sizes = []
+        for d, conn in zip(self.shard_dirs, self._conns):
+            try:
+                status, payload = conn.recv()
+            except (EOFError, OSError):
+                status, payload = "error", "worker exited before reporting ready"
+            if status != "ready":
+                self.close()
+                raise RuntimeError(f"Failed to load shard {d}: {payload}")
+            self.shard_sizes.append(payload)
+
+    @classmethod
+    def load(cls, store_dir, **kwargs):
+        shards_root = Path(store_dir) / "shards"
+        manifest = json.loads((shards_root / MANIFEST).read_text(encoding="utf-8"))
+        return cls([shards_root / name for name in manifest["shards"]], **kwargs)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(self.shard_sizes)
+
+    def search_vectors(self, q_embs: np.ndarray, k: int = 5) -> List[List[Tuple[float, str]]]:
+        """Top-k (distance, text) per query row, merged across all shards (smaller L2 = better)."""
+        q_embs = np.ascontiguousarray(q_embs, dtype=np.float32)
+        with self._lock:
+            for conn in self._conns:
+                conn.send((q_embs, k))
+            per_shard = [conn.recv() for conn in self._conns]
+
+        merged = []
+        for row in range(q_embs.shape[0]):
+            candidates = (hit for shard_hits in per_shard for hit in shard_hits[row])
+            merged.append(heapq.nsmallest(k, candidates, key=lambda h: h[0]))
+        return merged
+
+    def search(self, query, k=5):
+        q_emb = self.model.encode([query])
+        return [text for _, text in self.search_vectors(np.array(q_emb), k)[0]]
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+                conn.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():   # e.g. still loading its index when close() was called
+                p.terminate()
+                p.join()
+        self._conns, self._procs = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
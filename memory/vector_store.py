@@ -1,19 +1,71 @@
+from pathlib import Path
+from threading import Lock
+import json
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from config import INFERENCE_BACKEND
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+DIM = 384
+
+
+class LockedEmbedder:
+    """
+    Serializes encode() calls. HF fast tokenizers are not thread-safe ("Already borrowed"),
+    and the same embedder is used by RAG retrieval and the conversation-memory worker.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = Lock()
+
+    def encode(self, texts, **kwargs):
+        with self._lock:
+            return self.model.encode(texts, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def load_embedder(backend=INFERENCE_BACKEND):
+    if backend == "onnx":
+        from core.onnx_backend import OnnxSentenceEncoder
+        return LockedEmbedder(OnnxSentenceEncoder())
+    from sentence_transformers import SentenceTransformer
+    return LockedEmbedder(SentenceTransformer(EMBED_MODEL_NAME))
+
+
+def read_texts(jsonl_path):
+    texts = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                texts.append(json.loads(line)["text"])
+    return texts
+
 
 class VectorStore:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.index = faiss.IndexFlatL2(384)
+    def __init__(self, backend=INFERENCE_BACKEND):
+        self.model = load_embedder(backend)
+        self.index = faiss.IndexFlatL2(DIM)
         self.texts = []
 
+    @classmethod
+    def load(cls, store_dir, backend=INFERENCE_BACKEND):
+        store_dir = Path(store_dir)
+        vs = cls(backend)
+        vs.index = faiss.read_index(str(store_dir / "vector.index"))
+        vs.texts = read_texts(store_dir / "vector_texts.jsonl")
+        return vs
+
     def add(self, texts):
         embeddings = self.model.encode(texts)
-        self.index.add(np.array(embeddings))
+        self.index.add(np.array(embeddings, dtype=np.float32))
         self.texts.extend(texts)
 
     def search(self, query, k=5):
         q_emb = self.model.encode([query])
-        _, idx = self.index.search(np.array(q_emb), k)
-        return [self.texts[i] for i in idx[0]]
+        _, idx = self.index.search(np.array(q_emb, dtype=np.float32), k)
+        # faiss pads with -1 when the index has fewer than k vectors
+        return [self.texts[i] for i in idx[0] if i >= 0]
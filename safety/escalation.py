@@ -1,5 +1,412 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from config import (
+    RISK_THRESHOLD,
+    ESCALATE_ON_HIGH_LEVEL,
+    ESCALATION_DB,
+    ESCALATION_BATCH_SIZE,
+    ESCALATION_FLUSH_MS,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS escalations (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at  REAL NOT NULL,
+    session_id  TEXT,
+    risk_score  REAL NOT NULL,
+    risk_level  TEXT,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    reviewer    TEXT,
+    claimed_at  REAL,
+    resolved_at REAL,
+    note        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_escalations_status ON escalations(status, id);
+"""
+
+_INSERT = (
+    "INSERT INTO escalations (created_at, session_id, risk_score, risk_level, payload) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+_STOP = object()
+_MAX_BACKOFF_S = 5.0      # cap for retry delay while the DB is locked / full / failing
+_MAX_ROW_ATTEMPTS = 5     # a row rejected for data reasons this often goes to the dead-letter file
+_FINAL_ATTEMPTS = 3       # retries left after close() before remaining rows are dead-lettered
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class EscalationPolicy:
+    """
+    The one place that decides whether a turn goes to a human.
+    """
+    threshold: float = RISK_THRESHOLD
+    escalate_on_high_level: bool = ESCALATE_ON_HIGH_LEVEL
+
+    def should_escalate(self, risk_score: float, risk_level: Optional[str] = None) -> bool:
+        if risk_score > self.threshold:
+            return True
+        return self.escalate_on_high_level and risk_level == "high"
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # FULL: every commit is fsync'ed. The writer commits once per batch, so this is one fsync per batch.
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+class EscalationQueue:
+    """
+    Append-only escalation log on SQLite (WAL mode).
+
+    Producer side (the tutor turn): `enqueue()` only puts a dict on an in-memory queue
+    and returns (microseconds). A background writer thread drains it, inserts up to
+    `batch_size` rows per transaction and commits (fsync) at most every `flush_ms`.
+    A crash can lose at most the rows still in memory, i.e. one flush window.
+
+    Failed writes never drop rows: transient errors (locked DB, full disk, I/O) are
+    retried with backoff; if a batch is rejected for other reasons it is retried row by
+    row, and a row that keeps failing is appended to `<db>.deadletter.jsonl`.
+
+    Consumer side (reviewers, possibly another process): `pending()`, `claim()`,
+    `resolve()`, `get()` use their own connections; WAL lets them read while the
+    writer appends.
+    """
+
+    def __init__(
+        self,
+        db_path: str = ESCALATION_DB,
+        *,
+        batch_size: int = ESCALATION_BATCH_SIZE,
+        flush_ms: float = ESCALATION_FLUSH_MS,
+        start_writer: bool = True,
+    ):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_s = flush_ms / 1000.0
+
+        conn = _connect(self.db_path)
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        conn.close()
+
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Condition()
+        self._enqueued = 0
+        self._written = 0          # persisted rows (DB or dead-letter file)
+        self.dead_lettered = 0
+        self._writer_alive = False
+        self._thread = None
+        if start_writer:
+            self._writer_alive = True
+            self._thread = threading.Thread(target=self._writer, name="escalation-writer", daemon=True)
+            self._thread.start()
+
+    @property
+    def deadletter_path(self) -> str:
+        return self.db_path + ".deadletter.jsonl"
+
+    # ---------- producer ----------
+    def enqueue(self, risk_score: float, payload: Dict[str, Any], *,
+                risk_level: Optional[str] = None, session_id: Optional[str] = None):
+        # serialize here, so a bad payload can never reach (and stall) the writer
+        try:
+            payload_json = json.dumps(payload, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            log.error("escalation payload not JSON-serializable (%s); storing its repr", e)
+            try:
+                text = repr(payload)
+            except Exception:
+                text = "<unrepresentable payload>"
+            payload_json = json.dumps({"unserializable_payload": text, "error": str(e)}, ensure_ascii=False)
+
+        with self._lock:
+            self._enqueued += 1
+            alive = self._writer_alive
+        if not alive:
+            log.error("escalation writer is not running; row kept in memory until close()")
+        self._q.put((time.time(), session_id, float(risk_score), risk_level, payload_json))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything enqueued so far is on disk. Returns False on timeout;
+        raises RuntimeError if the writer is not running and rows are still unwritten.
+        """
+        with self._lock:
+            target = self._enqueued
+            done = self._lock.wait_for(
+                lambda: self._written >= target or not self._writer_alive, timeout=timeout
+            )
+            if self._written < target and not self._writer_alive:
+                raise RuntimeError(
+                    f"escalation writer is not running; {target - self._written} row(s) not written"
+                )
+            return done
+
+    def close(self):
+        if self._thread is not None:
+            self._q.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+        # whatever the writer did not persist (e.g. it died) is kept in the dead-letter file
+        leftover = []
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._dead_letter(leftover, "writer stopped before these rows were written")
+
+        with self._lock:
+            missing = self._enqueued - self._written
+        if missing > 0:
+            log.error("%d escalation row(s) could not be persisted", missing)
+
+    # ---------- writer ----------
+    def _collect(self, first_timeout: Optional[float]):
+        """One batch from the queue: (rows, saw_stop). Blocks up to `first_timeout` for the first row."""
+        rows = []
+        try:
+            item = self._q.get(timeout=first_timeout)
+        except queue.Empty:
+            return rows, False
+        if item is _STOP:
+            return rows, True
+        rows.append(item)
+        deadline = time.monotonic() + self.flush_s
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return rows, True
+            rows.append(item)
+        return rows, False
+
+    def _writer(self):
+        conn = None
+        pending: List[list] = []   # [row, attempts]
+        delay = 0.0
+        stop = False
+        final_attempts = 0
+        try:
+            while True:
+                if not stop:
+                    rows, stop = self._collect(delay if pending else None)
+                    pending.extend([row, 0] for row in rows)
+                elif pending:
+                    time.sleep(delay)
+
+                if pending:
+                    if conn is None:
+                        try:
+                            conn = _connect(self.db_path)
+                        except sqlite3.Error as e:
+                            log.warning("escalation DB unavailable (%s); retrying", e)
+                    if conn is not None:
+                        pending, conn = self._persist(conn, pending)
+
+                if not pending:
+                    delay = 0.0
+                    if stop:
+                        break
+                    continue
+
+                delay = min(max(delay * 2, 0.05), _MAX_BACKOFF_S)
+                log.warning("%d escalation row(s) not written yet; retrying in %.2fs", len(pending), delay)
+                if stop:
+                    final_attempts += 1
+                    if final_attempts > _FINAL_ATTEMPTS:
+                        self._dead_letter([row for row, _ in pending], "closing with unwritten rows")
+                        break
+        except BaseException:
+            log.exception("escalation writer crashed")
+            if pending:
+                self._dead_letter([row for row, _ in pending], "writer crashed")
+        finally:
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                self._writer_alive = False
+                self._lock.notify_all()
+
+    def _persist(self, conn, pending):
+        """Write pending rows; returns (rows still to retry, connection or None to reconnect)."""
+        try:
+            with conn:
+                conn.executemany(_INSERT, [row for row, _ in pending])
+            self._mark_written(len(pending))
+            return [], conn
+        except sqlite3.OperationalError as e:
+            # locked / full / I/O: every row would fail the same way, retry the whole batch later
+            log.warning("escalation batch of %d row(s) failed: %s", len(pending), e)
+            conn.close()
+            return [[row, n + 1] for row, n in pending], None
+        except sqlite3.Error as e:
+            log.warning("escalation batch of %d row(s) rejected (%s); inserting row by row", len(pending), e)
+
+        retry, written = [], 0
+        for i, (row, n) in enumerate(pending):
+            try:
+                with conn:
+                    conn.execute(_INSERT, row)
+                written += 1
+            except sqlite3.OperationalError as e:
+                log.warning("escalation insert failed: %s", e)
+                retry.extend([r, k + 1] for r, k in pending[i:])
+                self._mark_written(written)
+                conn.close()
+                return retry, None
+            except sqlite3.Error as e:
+                if n + 1 >= _MAX_ROW_ATTEMPTS:
+                    self._dead_letter([row], f"rejected {n + 1} times: {e}")
+                else:
+                    log.warning("escalation row rejected (%s); will retry", e)
+                    retry.append([row, n + 1])
+        self._mark_written(written)
+        return retry, conn
+
+    def _mark_written(self, n: int):
+        if n:
+            with self._lock:
+                self._written += n
+                self._lock.notify_all()
+
+    def _dead_letter(self, rows, reason: str):
+        try:
+            with open(self.deadletter_path, "a", encoding="utf-8") as f:
+                for ts, sid, score, level, payload_json in rows:
+                    f.write(json.dumps({
+                        "created_at": ts, "session_id": sid, "risk_score": score,
+                        "risk_level": level, "payload": payload_json, "reason": reason,
+                    }, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            log.exception("could not write %d escalation row(s) to %s: %r", len(rows), self.deadletter_path, rows)
+            return
+        log.error("%d escalation row(s) written to %s (%s)", len(rows), self.deadletter_path, reason)
+        with self._lock:
+            self.dead_lettered += len(rows)
+        self._mark_written(len(rows))
+
+    # ---------- consumer ----------
+    @staticmethod
+    def _row(r) -> Dict[str, Any]:
+        keys = ("id", "created_at", "session_id", "risk_score", "risk_level", "payload",
+                "status", "reviewer", "claimed_at", "resolved_at", "note")
+        d = dict(zip(keys, r))
+        d["payload"] = json.loads(d["payload"])
+        return d
+
+    def pending(self, limit: int = 20) -> List[Dict[str, Any]]:
+        conn = _connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT * FROM escalations WHERE status = 'pending' ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self._row(r) for r in rows]
+
+    def claim(self, reviewer: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """Atomically move up to `limit` oldest pending items to 'claimed' for this reviewer."""
+        conn = _connect(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM escalations WHERE status = 'pending' ORDER BY id LIMIT ?", (limit,)
+            )]
+            if ids:
+                marks = ",".join("?" * len(ids))
+                conn.execute(
+                    f"UPDATE escalations SET status = 'claimed', reviewer = ?, claimed_at = ? WHERE id IN ({marks})",
+                    [reviewer, time.time(), *ids],
+                )
+                rows = conn.execute(f"SELECT * FROM escalations WHERE id IN ({marks}) ORDER BY id", ids).fetchall()
+            else:
+                rows = []
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return [self._row(r) for r in rows]
+
+    def resolve(self, escalation_id: int, reviewer: str, note: str = "") -> bool:
+        conn = _connect(self.db_path)
+        try:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE escalations SET status = 'resolved', reviewer = ?, resolved_at = ?, note = ? "
+                    "WHERE id = ? AND status != 'resolved'",
+                    (reviewer, time.time(), note, escalation_id),
+                )
+        finally:
+            conn.close()
+        return cur.rowcount == 1
+
+    def get(self, escalation_id: int) -> Optional[Dict[str, Any]]:
+        conn = _connect(self.db_path)
+        try:
+            r = conn.execute("SELECT * FROM escalations WHERE id = ?", (escalation_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row(r) if r else None
+
+
 class HumanEscalation:
-    def check(self, risk_score):
-        if risk_score > 0.8:
+    def __init__(self, policy: Optional[EscalationPolicy] = None, store: Optional[EscalationQueue] = None):
+        self.policy = policy or EscalationPolicy()
+        self.store = store if store is not None else EscalationQueue()
+
+    def check(self, risk_score, risk_level=None):
+        if self.policy.should_escalate(risk_score, risk_level):
             return "ESCALATE_TO_HUMAN"
         return "OK"
+
+    def handle(self, state: Dict[str, Any], session_id: Optional[str] = None) -> str:
+        """
+        Decide for a finished turn and, if escalated, hand it to the queue (non-blocking).
+        """
+        risk = state.get("risk_score", 0.0)
+        level = state.get("risk_level")
+        decision = self.check(risk, level)
+        if decision != "OK":
+            self.store.enqueue(
+                risk,
+                {
+                    "user_input": state.get("user_input", ""),
+                    "final_response": state.get("final_response", ""),
+                    "risk_reasons": state.get("risk_reasons", {}),
+                    "emotion": state.get("emotion", {}),
+                    "route": state.get("route", []),
+                },
+                risk_level=level,
+                session_id=session_id,
+            )
+        return decision
+
+    def close(self):
+        self.store.close()
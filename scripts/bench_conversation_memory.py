@@ -0,0 +1,112 @@
+"""
+Conversation memory benchmark over long sessions (default: 100 turns).
+
+Default mode measures the request-path cost of memory/conversation.py
+(context() + record()) and the history tokens added to the prompt, next to a
+naive "append every turn" history. Needs the embedder and a running Ollama
+(for the background summary).
+
+    python scripts/bench_conversation_memory.py --turns 100
+
+--e2e runs full TutorOrchestrator.handle() turns instead (needs the built KB).
+"""
+from pathlib import Path
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from memory.conversation import ConversationManager, approx_tokens
+
+QUESTIONS = [
+    "What is {t}?",
+    "Can you give me an example of {t}?",
+    "How is {t} used in practice?",
+    "I'm confused about {t}, can you explain it more simply?",
+    "What are common mistakes with {t}?",
+]
+
+
+def script(turns: int):
+    text = (ROOT / "data" / "kb.txt").read_text(encoding="utf-8")
+    topics = re.findall(r"## Topic: (.+)", text) or ["machine learning"]
+    paras = [re.sub(r"\s+", " ", p).strip() for p in text.split("\n\n") if len(p.strip()) > 80]
+    for i in range(turns):
+        t = topics[i % len(topics)].strip()
+        yield QUESTIONS[i % len(QUESTIONS)].format(t=t), " ".join(paras[i % len(paras): i % len(paras) + 3])
+
+
+def report(rows, label):
+    # rows: (turn, latency_ms, history_tokens, naive_tokens)
+    print(f"\n== {label} ==")
+    print(f"{'turn':>5s} {'latency ms':>11s} {'history tok':>12s} {'naive tok':>10s}")
+    marks = {1, 5, 10, 25, 50, 75, len(rows)}
+    for turn, ms, tok, naive in rows:
+        if turn in marks:
+            print(f"{turn:5d} {ms:11.2f} {tok:12d} {naive:10d}")
+
+    lat = np.array([r[1] for r in rows])
+    x = np.arange(1, len(rows) + 1)
+    slope = np.polyfit(x, lat, 1)[0] if len(rows) > 1 else 0.0
+    tenth = max(1, len(rows) // 10)
+    print(f"mean latency first {tenth} turns: {lat[:tenth].mean():.2f} ms, last {tenth}: {lat[-tenth:].mean():.2f} ms")
+    print(f"latency slope: {slope * 1000:.3f} µs/turn   max history tokens: {max(r[2] for r in rows)}")
+
+
+def bench_memory(turns: int):
+    from core.llm_client import LLMClient
+    from memory.vector_store import load_embedder
+
+    mgr = ConversationManager(LLMClient(), load_embedder())
+    rows = []
+    naive = 0
+    for i, (q, a) in enumerate(script(turns), 1):
+        s = time.perf_counter()
+        history = mgr.context("bench", q)
+        mgr.record("bench", q, a)
+        ms = (time.perf_counter() - s) * 1000
+        rows.append((i, ms, approx_tokens(history), naive))
+        naive += approx_tokens(f"Student: {q}\nTutor: {a}")
+        # steady state: the summarizer normally runs while the student reads/types
+        mgr.flush()
+    mgr.close()
+    report(rows, "memory request path (context + record)")
+
+
+def bench_e2e(turns: int, kb_store: str):
+    from core.orchestrator import TutorOrchestrator
+
+    tutor = TutorOrchestrator(kb_store_dir=kb_store)
+    rows = []
+    naive = 0
+    for i, (q, _) in enumerate(script(turns), 1):
+        s = time.perf_counter()
+        out = tutor.handle(q, session_id="bench")
+        ms = (time.perf_counter() - s) * 1000
+        rows.append((i, ms, out["history_tokens"], naive))
+        naive += approx_tokens(f"Student: {q}\nTutor: {out['response']}")
+        tutor.conversations.flush()
+    tutor.close()
+    report(rows, "end-to-end TutorOrchestrator.handle")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=100)
+    ap.add_argument("--e2e", action="store_true")
+    ap.add_argument("--kb-store", default="kb_store")
+    args = ap.parse_args()
+
+    if args.e2e:
+        bench_e2e(args.turns, args.kb_store)
+    else:
+        bench_memory(args.turns)
+
+
+if __name__ == "__main__":
+    main()
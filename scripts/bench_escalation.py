@@ -0,0 +1,58 @@
+"""
+Escalation queue benchmark: producer-side enqueue latency (µs) and writer throughput.
+
+    python scripts/bench_escalation.py --n 20000
+"""
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from safety.escalation import EscalationQueue
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--flush-ms", type=float, default=50)
+    args = ap.parse_args()
+
+    payload = {
+        "user_input": "I can't sleep and I feel like giving up on everything.",
+        "final_response": "x" * 1500,
+        "risk_reasons": {"self_harm_risk": 0.7, "hopelessness": 0.8},
+        "route": ["tutor", "coach", "critic"],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        q = EscalationQueue(Path(tmp) / "esc.db", batch_size=args.batch_size, flush_ms=args.flush_ms)
+
+        lat = []
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            s = time.perf_counter_ns()
+            q.enqueue(0.9, payload, risk_level="high", session_id=f"s{i % 50}")
+            lat.append((time.perf_counter_ns() - s) / 1000.0)
+        t_enq = time.perf_counter() - t0
+
+        q.flush()
+        t_all = time.perf_counter() - t0
+        pending = len(q.pending(limit=args.n))
+        q.close()
+
+    lat.sort()
+    print(f"rows: {args.n}  (batch_size={args.batch_size}, flush_ms={args.flush_ms})")
+    print(f"enqueue latency  p50 {lat[len(lat) // 2]:.2f} µs   p99 {lat[int(len(lat) * 0.99)]:.2f} µs   "
+          f"max {lat[-1]:.2f} µs   mean {statistics.fmean(lat):.2f} µs")
+    print(f"producer time    {t_enq * 1000:.1f} ms")
+    print(f"durable (fsync)  {t_all * 1000:.1f} ms  -> {args.n / t_all:,.0f} rows/s")
+    print(f"rows readable by consumer: {pending}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+CPU benchmark for the embedder and the emotion classifier across backends:
+torch (fp32), onnx fp32, onnx int8.
+
+Each (model, backend) runs in its own subprocess so RSS is not shared.
+Reports per-query latency (batch 1), throughput (batched) and RSS.
+
+    python scripts/export_onnx.py          # once
+    python scripts/bench_inference_backends.py --queries 200 --threads 4
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+BACKENDS = ("torch", "onnx-fp32", "onnx-int8")
+MODELS = ("embed", "emotion")
+
+QUERIES = [
+    "What is the difference between supervised and unsupervised learning?",
+    "Why do we need a validation set?",
+    "I feel overwhelmed by all the math in this course.",
+    "Explain the bias-variance tradeoff with an example.",
+    "How does regularization reduce overfitting?",
+    "I'm worried I will never understand neural networks.",
+    "What does the learning rate control in gradient descent?",
+    "Can you give me an intuition for precision and recall?",
+]
+
+
+def rss_mb():
+    # psutil is optional: without it RSS is reported as n/a
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss / 1e6
+
+
+def load(model: str, backend: str, threads: int):
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+        if model == "embed":
+            from sentence_transformers import SentenceTransformer
+            m = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+            return lambda xs: m.encode(xs, batch_size=len(xs))
+        from transformers import pipeline
+        p = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base",
+                     return_all_scores=True, device=-1)
+        return lambda xs: p(xs)
+
+    from core.onnx_backend import OnnxSentenceEncoder, OnnxTextClassifier
+    quantized = backend == "onnx-int8"
+    if model == "embed":
+        m = OnnxSentenceEncoder(quantized=quantized, num_threads=threads)
+        return lambda xs: m.encode(xs, batch_size=len(xs))
+    c = OnnxTextClassifier(quantized=quantized, num_threads=threads)
+    return lambda xs: c(xs)
+
+
+def worker(model: str, backend: str, queries: int, batch: int, threads: int):
+    rss0 = rss_mb()
+    t = time.perf_counter()
+    fn = load(model, backend, threads)
+    load_s = time.perf_counter() - t
+    rss_loaded = rss_mb()
+
+    for q in QUERIES[:3]:   # warmup
+        fn([q])
+
+    lat = []
+    for i in range(queries):
+        q = QUERIES[i % len(QUERIES)]
+        s = time.perf_counter()
+        fn([q])
+        lat.append((time.perf_counter() - s) * 1000)
+    lat.sort()
+
+    items = [QUERIES[i % len(QUERIES)] for i in range(queries)]
+    s = time.perf_counter()
+    for i in range(0, len(items), batch):
+        fn(items[i: i + batch])
+    thr = len(items) / (time.perf_counter() - s)
+
+    print(json.dumps({
+        "model": model,
+        "backend": backend,
+        "load_s": load_s,
+        "p50_ms": lat[len(lat) // 2],
+        "p95_ms": lat[int(len(lat) * 0.95)],
+        "throughput_qps": thr,
+        "rss_base_mb": rss0,
+        "rss_loaded_mb": rss_loaded,
+        "rss_peak_mb": rss_mb(),
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    ap.add_argument("--worker", nargs=2, metavar=("MODEL", "BACKEND"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker(*args.worker, queries=args.queries, batch=args.batch, threads=args.threads)
+        return
+
+    print(f"queries={args.queries} batch={args.batch} threads={args.threads}\n")
+    print(f"{'model':8s} {'backend':10s} {'load s':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'q/s':>9s} {'RSS MB':>8s}")
+    for model in args.models:
+        for backend in args.backends:
+            cmd = [sys.executable, __file__, "--worker", model, backend,
+                   "--queries", str(args.queries), "--batch", str(args.batch), "--threads", str(args.threads)]
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=str(ROOT))
+            line = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ""
+            if proc.returncode != 0 or not line.startswith("{"):
+                err = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+                print(f"{model:8s} {backend:10s} failed: {err}")
+                continue
+            r = json.loads(line)
+            rss = "n/a" if r["rss_peak_mb"] is None else f"{r['rss_peak_mb']:.0f}"
+            print(f"{model:8s} {backend:10s} {r['load_s']:7.2f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+                  f"{r['throughput_qps']:9.1f} {rss:>8s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Measure Ollama prompt_eval_duration for the old per-agent prompt layout vs the
+shared-prefix layout (agents/prompting.py).
+
+Needs a running Ollama with OLLAMA_MODEL pulled. No FAISS needed: evidence is
+cut from data/kb.txt to roughly the size rag_retrieve_node produces.
+
+    python scripts/bench_prompt_cache.py --turns 5
+
+By default tutor, coach and critic are sent concurrently, like the graph's
+fan-out after the affect node. Prefix reuse then depends on the server's
+OLLAMA_NUM_PARALLEL. With 1, Ollama queues the three requests in one slot and
+the 2nd and 3rd reuse the prefix. With more, they land in different slots,
+each with its own KV cache, and every slot evaluates the evidence again.
+--sequential sends them one after another (best case, not what the graph does).
+
+Only agent calls are measured. The risk model's feature-extraction call uses
+its own client (agents.graph.llm) and a different prompt, so it is excluded.
+
+--num-predict is tiny because only prompt eval is timed. To check that real
+replies fit the per-agent limits in config.py (TUTOR/COACH/CRITIC_NUM_PREDICT),
+run the actual agents once per query:
+
+    python scripts/bench_prompt_cache.py --check-replies
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import os
+import re
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.llm_client import LLMClient
+from agents.prompting import build_messages
+
+QUERIES = [
+    "What is the difference between supervised and unsupervised learning?",
+    "Why do we split data into training and test sets?",
+    "Can you explain overfitting with a simple example?",
+    "How does gradient descent find the minimum?",
+    "What does a loss function measure?",
+    "I keep failing my ML quizzes and I'm not sure I can do this.",
+]
+
+ROLES = {
+    "tutor": (
+        "You are an academic tutor. Be precise, structured, and grounded in retrieved context.",
+        "You MUST use the following retrieved knowledge as your primary grounding.\n"
+        "If the knowledge is insufficient, say what is missing and ask one clarifying question.",
+        "Student question",
+    ),
+    "coach": (
+        "You are an empathetic motivational coach. Support autonomy, competence, and relatedness.",
+        "You are a motivational coach grounded in retrieved knowledge.\n"
+        "Use supportive, autonomy-supportive language (SDT). Avoid medical claims.",
+        "Student message",
+    ),
+    "critic": (
+        "You are a safety and ethics monitor for an educational tutor.",
+        "Check safety and ethics risks. If user suggests self-harm, crisis, or severe distress, flag it clearly.\n"
+        "Use the retrieved context only as reference.",
+        "User message",
+    ),
+}
+
+
+def evidence_for(turn: int, budget_chars: int = 2200) -> str:
+    text = (ROOT / "data" / "kb.txt").read_text(encoding="utf-8")
+    sections = [s.strip() for s in re.split(r"\n---\n", text) if s.strip()]
+    picked = sections[turn % len(sections):] + sections[: turn % len(sections)]
+    lines = ["You are given retrieved evidence to ground your answer.", "## Retrieved Notes (Vector Store)"]
+    for s in picked:
+        lines.append("- " + re.sub(r"\s+", " ", s))
+    return "\n".join(lines)[:budget_chars]
+
+
+def legacy_messages(state, system, instructions, label):
+    # layout before agents/prompting.py: role text first, evidence + message after, one user message
+    user = f"{instructions}\n\n{state['rag_context']}\n\n{label}:\n{state['user_input']}"
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def shared_messages(state, system, instructions, label):
+    return build_messages(state, role=system, instructions=instructions, user_label=label)
+
+
+def check_num_parallel():
+    # the server reads OLLAMA_NUM_PARALLEL at startup and the API does not report it;
+    # this only sees it if `ollama serve` was started from the same shell
+    seen = os.environ.get("OLLAMA_NUM_PARALLEL")
+    if seen is None:
+        print("[!] OLLAMA_NUM_PARALLEL not set here; results assume the server runs with 1")
+    elif seen != "1":
+        print(f"[!] OLLAMA_NUM_PARALLEL={seen}, expected 1: "
+              "parallel agent calls land in different slots and do not share the cached prefix")
+
+
+def run(layout, build, turns, num_predict, parallel):
+    # one client per role, so each client's stats.last belongs to that role's call
+    clients = {name: LLMClient() for name in ROLES}
+    clients["tutor"].warm()
+    pool = ThreadPoolExecutor(max_workers=len(ROLES)) if parallel else None
+
+    def call(name, state):
+        system, instructions, label = ROLES[name]
+        llm = clients[name]
+        llm.chat_messages(build(state, system, instructions, label), temperature=0.0, num_predict=num_predict)
+        last = llm.stats.snapshot()["last"]
+        return name, last["prompt_eval_count"], last["prompt_eval_duration"] / 1e6
+
+    rows = []
+    for t in range(turns):
+        state = {"user_input": QUERIES[t % len(QUERIES)], "rag_context": evidence_for(t)}
+        if pool:
+            rows.extend(pool.map(lambda name: call(name, state), ROLES))
+        else:
+            rows.extend(call(name, state) for name in ROLES)
+    if pool:
+        pool.shutdown()
+
+    print(f"\n== {layout} ({'parallel' if parallel else 'sequential'}) ==")
+    for name in ROLES:
+        sub = [r for r in rows if r[0] == name]
+        ms = sum(r[2] for r in sub) / len(sub)
+        toks = sum(r[1] for r in sub) / len(sub)
+        print(f"  {name:6s}: prompt_eval {ms:8.1f} ms   evaluated tokens {toks:7.1f}")
+    total = sum(r[2] for r in rows) / turns
+    print(f"  per turn total prompt_eval: {total:.1f} ms")
+    return total
+
+
+def check_replies():
+    from agents.tutor_agent import tutor_agent
+    from agents.coach_agent import coach_agent
+    from agents.critic_agent import critic_agent
+
+    agents = {"tutor": tutor_agent, "coach": coach_agent, "critic": critic_agent}
+    clients = {name: LLMClient() for name in agents}
+    clients["tutor"].warm()
+    print("\n== reply check (config num_predict) ==")
+    for t, query in enumerate(QUERIES):
+        state = {"user_input": query, "rag_context": evidence_for(t)}
+        for name, agent in agents.items():
+            stats = clients[name].stats
+            before = stats.snapshot()["truncated"]
+            text = agent(state, clients[name])[f"{name}_response"]
+            snap = stats.snapshot()
+            flag = "TRUNCATED" if snap["truncated"] > before else ("EMPTY" if not text else "ok")
+            print(f"  q{t} {name:6s}: {snap['last']['eval_count']:4d} tokens  {flag}")
+    print("TRUNCATED/EMPTY means the reply hit num_predict: raise the limit or shorten the instructions.")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=5)
+    ap.add_argument("--num-predict", type=int, default=16)
+    ap.add_argument("--sequential", action="store_true", help="send agents one by one instead of fanning out")
+    ap.add_argument("--check-replies", action="store_true", help="run the agents with their real limits")
+    args = ap.parse_args()
+
+    if args.check_replies:
+        check_replies()
+        return
+
+    parallel = not args.sequential
+    if parallel:
+        check_num_parallel()
+    before = run("legacy layout", legacy_messages, args.turns, args.num_predict, parallel)
+    after = run("shared-prefix layout", shared_messages, args.turns, args.num_predict, parallel)
+    if before > 0:
+        print(f"\nprompt_eval per turn: {before:.1f} ms -> {after:.1f} ms ({100 * (1 - after / before):.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Scaling benchmark for the sharded vector index (memory/sharded_store.py).
+
+Builds a synthetic KB of N random unit vectors (dim 384), writes it as 1/2/4/8
+shards, and for each shard count measures per-query latency, batched throughput,
+recall vs. a single in-process IndexFlatL2, and per-worker RSS.
+
+    python scripts/bench_sharded_index.py --n 500000 --shards 1 2 4 8
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from memory.sharded_store import ShardedVectorStore, shard_for, write_manifest
+from memory.vector_store import DIM
+
+
+def synth(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((n, DIM), dtype=np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x
+
+
+def write_shards(root: Path, vecs: np.ndarray, num_shards: int):
+    manifest = write_manifest(root / "shards", num_shards, "hash", DIM)
+    assign = np.array([shard_for(i, "", num_shards, "hash") for i in range(len(vecs))])
+    for s, name in enumerate(manifest["shards"]):
+        d = root / "shards" / name
+        d.mkdir(parents=True, exist_ok=True)
+        ids = np.nonzero(assign == s)[0]
+        index = faiss.IndexFlatL2(DIM)
+        index.add(vecs[ids])
+        faiss.write_index(index, str(d / "vector.index"))
+        with open(d / "vector_texts.jsonl", "w", encoding="utf-8") as f:
+            for i in ids:
+                f.write(json.dumps({"text": f"doc-{i}", "meta": {"chunk_id": int(i), "shard": s}}) + "\n")
+
+
+def workers_rss_mb(store: ShardedVectorStore) -> list:
+    try:
+        import psutil
+    except ImportError:
+        return []
+    return [psutil.Process(p.pid).memory_info().rss / 1e6 for p in store._procs]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--k", type=int, default=6)
+    args = ap.parse_args()
+
+    # one OpenMP thread everywhere so the scaling comes from shards, not intra-op threads
+    faiss.omp_set_num_threads(1)
+    vecs = synth(args.n)
+    queries = synth(args.queries, seed=1)
+
+    flat = faiss.IndexFlatL2(DIM)
+    flat.add(vecs)
+    _, truth = flat.search(queries, args.k)
+
+    lat = []
+    for q in queries:
+        s = time.perf_counter()
+        flat.search(q[None, :], args.k)
+        lat.append((time.perf_counter() - s) * 1000)
+    lat.sort()
+    print(f"N={args.n:,} dim={DIM} k={args.k} queries={args.queries}\n")
+    print(f"{'layout':14s} {'p50 ms':>8s} {'p95 ms':>8s} {'batch q/s':>10s} {'recall':>7s} {'max worker RSS MB':>18s}")
+    print(f"{'flat (1 proc)':14s} {lat[len(lat) // 2]:8.2f} {lat[int(len(lat) * 0.95)]:8.2f} {'-':>10s} {'1.000':>7s} {'-':>18s}")
+
+    for n_shards in args.shards:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            write_shards(root, vecs, n_shards)
+            with ShardedVectorStore.load(root, load_model=False) as store:
+                store.search_vectors(queries[:2], args.k)   # warmup
+
+                lat = []
+                got = []
+                for q in queries:
+                    s = time.perf_counter()
+                    hits = store.search_vectors(q[None, :], args.k)[0]
+                    lat.append((time.perf_counter() - s) * 1000)
+                    got.append([int(t.split("-")[1]) for _, t in hits])
+                lat.sort()
+
+                s = time.perf_counter()
+                for i in range(0, len(queries), args.batch):
+                    store.search_vectors(queries[i: i + args.batch], args.k)
+                qps = len(queries) / (time.perf_counter() - s)
+
+                recall = np.mean([len(set(g) & set(t)) / args.k for g, t in zip(got, truth)])
+                rss = workers_rss_mb(store)
+
+            print(f"{f'{n_shards} shard(s)':14s} {lat[len(lat) // 2]:8.2f} {lat[int(len(lat) * 0.95)]:8.2f} "
+                  f"{qps:10.1f} {recall:7.3f} {(max(rss) if rss else float('nan')):18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Offline KG builder: extract (head, relation, tail) triplets from every chunk in
+vector_texts.jsonl with the local LLM, then bulk-load them into a KnowledgeGraph
+and save it as kb_store/kg.npz (loaded by TutorOrchestrator).
+
+Extraction runs in a process pool. Every finished chunk is appended to
+kg_triplets.jsonl, so an interrupted run resumes where it stopped.
+
+    python scripts/build_kg.py --store kb_store --workers 4
+"""
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from analystics.feature_extractor import safe_json_load
+from memory.knowledge_graph import KnowledgeGraph
+
+MAX_TRIPLETS_PER_CHUNK = 20
+MAX_NAME_CHARS = 80
+
+SYSTEM = (
+    "You are a knowledge graph extractor for machine learning course notes.\n"
+    "Output ONLY valid JSON. No markdown, no explanation."
+)
+
+USER_TEMPLATE = """Extract the key factual relations from the text as (head, relation, tail) triplets.
+- head and tail are short concept names (1-5 words), e.g. "gradient descent", "learning rate"
+- relation is a short verb phrase, e.g. "is a", "uses", "part of", "prevents"
+- at most {max_n} triplets; skip anything not stated in the text
+
+Return: {{"triplets": [["head", "relation", "tail"], ...]}}
+
+Text:
+{text}
+"""
+
+_llm = None
+
+
+def _init_worker():
+    global _llm
+    from core.llm_client import LLMClient
+    _llm = LLMClient()
+
+
+def _parse(raw: str):
+    data = safe_json_load(raw)
+    out = []
+    for item in data.get("triplets", []) if isinstance(data, dict) else []:
+        if not isinstance(item, (list, tuple)) or len(item) != 3:
+            continue
+        h, r, t = (" ".join(str(x).split())[:MAX_NAME_CHARS] for x in item)
+        if h and r and t and h.lower() != t.lower():
+            out.append([h.lower(), r.lower(), t.lower()])
+    return out[:MAX_TRIPLETS_PER_CHUNK]
+
+
+def extract_chunk(chunk_id: int, text: str, retries: int = 1):
+    user = USER_TEMPLATE.format(max_n=MAX_TRIPLETS_PER_CHUNK, text=text)
+    triplets = []
+    for _ in range(retries + 1):
+        raw = _llm.chat(system=SYSTEM, user=user, temperature=0.0)
+        triplets = _parse(raw)
+        if triplets:
+            break
+    return chunk_id, triplets
+
+
+def iter_chunks(store: Path):
+    # flat layout, or every shard written by build_vector_kb.py
+    paths = [store / "vector_texts.jsonl"]
+    if not paths[0].exists():
+        paths = sorted((store / "shards").glob("shard_*/vector_texts.jsonl"))
+    if not paths:
+        raise FileNotFoundError(
+            f"No chunks found in {store}: expected {store / 'vector_texts.jsonl'} "
+            f"or {store / 'shards'}/shard_*/vector_texts.jsonl. Run scripts/build_vector_kb.py first."
+        )
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                cid = obj.get("meta", {}).get("chunk_id", f"{p.parent.name}:{line_no}")
+                yield cid, obj["text"]
+
+
+def load_done(ckpt: Path):
+    done = {}
+    if ckpt.exists():
+        with open(ckpt, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # partial last line from a crash
+                done[obj["chunk_id"]] = obj["triplets"]
+    return done
+
+
+def terminate_partial_line(path: Path):
+    # a crash mid-write leaves a partial last line; start the next append on a fresh line
+    if path.exists() and path.stat().st_size > 0:
+        with open(path, "rb+") as f:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store", default="kb_store")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--out", default=None, help="default: <store>/kg.npz")
+    args = ap.parse_args()
+
+    store = Path(args.store)
+    ckpt = store / "kg_triplets.jsonl"
+    out_path = Path(args.out) if args.out else store / "kg.npz"
+
+    chunks = list(iter_chunks(store))
+    done = load_done(ckpt)
+    todo = [(cid, text) for cid, text in chunks if cid not in done]
+    print(f"[1/3] Chunks: {len(chunks)} (already extracted: {len(done)}, to do: {len(todo)})")
+
+    t0 = time.perf_counter()
+    if todo:
+        print(f"[2/3] Extracting triplets with {args.workers} workers...")
+        terminate_partial_line(ckpt)
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool, \
+                open(ckpt, "a", encoding="utf-8") as f_ckpt:
+            futures = [pool.submit(extract_chunk, cid, text) for cid, text in todo]
+            for n, fut in enumerate(as_completed(futures), 1):
+                try:
+                    cid, triplets = fut.result()
+                except Exception as e:   # one bad chunk must not kill the run; it is retried next time
+                    print(f"  - chunk failed: {e}")
+                    continue
+                done[cid] = triplets
+                f_ckpt.write(json.dumps({"chunk_id": cid, "triplets": triplets}, ensure_ascii=False) + "\n")
+                f_ckpt.flush()
+                if n % 20 == 0 or n == len(todo):
+                    print(f"  - {n}/{len(todo)} chunks ({time.perf_counter() - t0:.1f}s)")
+    else:
+        print("[2/3] Nothing to extract.")
+
+    print("[3/3] Building and saving graph...")
+    kg = KnowledgeGraph()
+    kg.add_triplets(t for triplets in done.values() for t in triplets)
+    kg.save(out_path)
+
+    s = time.perf_counter()
+    KnowledgeGraph.load(out_path)
+    load_ms = (time.perf_counter() - s) * 1000
+
+    print("\n[OK] Knowledge graph built.")
+    print(f"- graph:  {out_path} ({out_path.stat().st_size / 1e3:.1f} KB)")
+    print(f"- nodes:  {len(kg.nodes)}   edges: {kg.num_edges}")
+    print(f"- load time: {load_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
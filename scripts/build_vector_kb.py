@@ -1,12 +1,15 @@
 from pathlib import Path
 import re
 import json
+import sys
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import torch
 
-RAW_FILE = Path(r"C:\Users\Xudon\Desktop\agent\data\kb.txt")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from config import INFERENCE_BACKEND
+from memory.sharded_store import MANIFEST, shard_for, write_manifest
+
+RAW_FILE = Path(r"C:\Users\Xudon\Desktop\agent\data\kb.txt")   # 文件或目录
 OUT_DIR = Path("data")
 
 MODEL_NAME = "all-MiniLM-L6-v2"
@@ -18,6 +21,12 @@ CHUNK_OVERLAP = 200
 ENCODE_BATCH_SIZE = 32       # 8/16/32 视内存调整
 ADD_BATCH_CHUNKS = 512      # 每次处理多少个 chunk（越小越省内存）
 NORMALIZE = True            # normalize embeddings（便于相似度更稳定）
+# 和查询端保持一致：用 onnx 建库，查询也要用 onnx（int8 向量和 fp32 有细微差别）
+BACKEND = INFERENCE_BACKEND
+
+# 分片：KB 超过单进程内存/单核扫描能力时用（查询端见 memory/sharded_store.py）
+NUM_SHARDS = 1              # 1 = 单个 vector.index（原布局）
+SHARD_BY = "hash"           # "hash"（按 chunk 均匀分）或 "source"（同一文件/课程放同一 shard）
 
 def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200):
     text = re.sub(r"\n{3,}", "\n\n", text).strip()
@@ -50,30 +59,87 @@ def count_existing_items(jsonl_path: Path) -> int:
             n += 1
     return n
 
+def load_model():
+    if BACKEND == "onnx":
+        from core.onnx_backend import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(), None
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return SentenceTransformer(MODEL_NAME, device=device), device
+
+def iter_sources(raw: Path):
+    # 单个文件，或整个课程目录（*.txt / *.md，每个文件是一个 source）
+    if raw.is_dir():
+        for p in sorted(raw.rglob("*")):
+            if p.suffix.lower() in (".txt", ".md"):
+                yield p.relative_to(raw).as_posix(), p.read_text(encoding="utf-8")
+    else:
+        yield raw.name, raw.read_text(encoding="utf-8")
+
+def check_existing_shards(shards_root: Path):
+    # 续跑只在分片设置不变时才安全：chunk -> shard 的分配取决于 NUM_SHARDS / SHARD_BY
+    manifest_path = shards_root / MANIFEST
+    if not manifest_path.exists():
+        return None
+    old = json.loads(manifest_path.read_text(encoding="utf-8"))
+    has_data = any(count_existing_items(p) for p in shards_root.glob("shard_*/vector_texts.jsonl"))
+    if not has_data:
+        return None   # nothing to resume, the manifest can be rewritten
+    want = {"num_shards": NUM_SHARDS, "shard_by": SHARD_BY, "dim": DIM}
+    if NUM_SHARDS <= 1:
+        raise RuntimeError(
+            f"{shards_root} already holds a sharded KB ({old.get('num_shards')} shards) but NUM_SHARDS = {NUM_SHARDS}. "
+            "Delete that directory or set NUM_SHARDS back to resume."
+        )
+    diff = {k: (old.get(k), v) for k, v in want.items() if old.get(k) != v}
+    if diff:
+        detail = ", ".join(f"{k}: {a!r} -> {b!r}" for k, (a, b) in diff.items())
+        raise RuntimeError(
+            f"Refusing to resume {shards_root}: sharding settings changed ({detail}). "
+            "Restore the old settings or delete the directory to rebuild."
+        )
+    return old
+
+def shard_targets():
+    # NUM_SHARDS <= 1: 原来的单索引布局；否则写到 OUT_DIR/shards/shard_XXX/
+    shards_root = OUT_DIR / "shards"
+    manifest = check_existing_shards(shards_root)
+    if NUM_SHARDS <= 1:
+        return [OUT_DIR]
+    if manifest is None:
+        manifest = write_manifest(shards_root, NUM_SHARDS, SHARD_BY, DIM)
+    return [shards_root / name for name in manifest["shards"]]
+
 def main():
-    print(torch.cuda.is_available())
     if not RAW_FILE.exists():
         raise FileNotFoundError(f"Raw KB file not found: {RAW_FILE}")
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    index_path = OUT_DIR / "vector.index"
-    jsonl_path = OUT_DIR / "vector_texts.jsonl"
+    targets = shard_targets()
+    for t in targets:
+        t.mkdir(parents=True, exist_ok=True)
+    index_paths = [t / "vector.index" for t in targets]
+    jsonl_paths = [t / "vector_texts.jsonl" for t in targets]
 
     print("[1/5] Loading raw KB...")
-    text = RAW_FILE.read_text(encoding="utf-8")
-    chunks = chunk_text(text, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP)
-    print(f"[2/5] Total chunks: {len(chunks)}")
+    chunks = []  # (source, text)
+    for source, text in iter_sources(RAW_FILE):
+        chunks.extend((source, ch) for ch in chunk_text(text, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP))
+    print(f"[2/5] Total chunks: {len(chunks)} (shards: {len(targets)}, shard_by: {SHARD_BY})")
 
     print("[3/5] Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME,device="cuda")
+    model, device = load_model()
+    print(f"  - backend: {BACKEND}, device: {device or 'cpu'}")
 
     print("[4/5] Loading/creating FAISS index...")
-    index = load_or_create_index(index_path)
+    indexes = [load_or_create_index(p) for p in index_paths]
 
-    #断点续跑：如果 jsonl 已有 N 行，则跳过前 N 个 chunks
-    already = count_existing_items(jsonl_path)
+    #断点续跑：所有 shard 的 jsonl 一共已有 N 行，则跳过前 N 个 chunks（shard 分配是确定性的）
+    already = sum(count_existing_items(p) for p in jsonl_paths)
     if already > 0:
-        print(f"[RESUME] Detected {already} existing items in {jsonl_path.name}.")
+        print(f"[RESUME] Detected {already} existing items.")
         if already >= len(chunks):
             print("[DONE] Nothing to add.")
             return
@@ -85,38 +151,53 @@ def main():
 
     print(f"[5/5] Encoding & adding to index (chunks to add: {len(chunks_to_add)})...")
 
-    with open(jsonl_path, "a", encoding="utf-8") as f_jsonl:
+    f_jsonls = [open(p, "a", encoding="utf-8") for p in jsonl_paths]
+    try:
         for base in range(0, len(chunks_to_add), ADD_BATCH_CHUNKS):
-            batch_chunks = chunks_to_add[base: base + ADD_BATCH_CHUNKS]
-            batch_ids = range(start_id + base, start_id + base + len(batch_chunks))
+            batch = chunks_to_add[base: base + ADD_BATCH_CHUNKS]
+            batch_ids = range(start_id + base, start_id + base + len(batch))
 
             #分批 encode
             emb = model.encode(
-                batch_chunks,
+                [ch for _, ch in batch],
                 batch_size=ENCODE_BATCH_SIZE,
                 normalize_embeddings=NORMALIZE,
                 show_progress_bar=True
             )
             emb = np.array(emb, dtype=np.float32)
 
-            index.add(emb)
+            shard_ids = np.array([
+                shard_for(cid, source, len(targets), SHARD_BY) if len(targets) > 1 else 0
+                for cid, (source, _) in zip(batch_ids, batch)
+            ])
+            for s in np.unique(shard_ids):
+                indexes[s].add(emb[shard_ids == s])
             del emb
-            torch.cuda.empty_cache()
+            if device == "cuda":
+                import torch
+                torch.cuda.empty_cache()
 
-            for cid, ch in zip(batch_ids, batch_chunks):
-                obj = {"text": ch, "meta": {"source": RAW_FILE.name, "chunk_id": cid}}
-                f_jsonl.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            for cid, s, (source, ch) in zip(batch_ids, shard_ids, batch):
+                obj = {"text": ch, "meta": {"source": source, "chunk_id": cid, "shard": int(s)}}
+                f_jsonls[s].write(json.dumps(obj, ensure_ascii=False) + "\n")
 
             #每批落盘
-            faiss.write_index(index, str(index_path))
+            for s in np.unique(shard_ids):
+                f_jsonls[s].flush()
+                faiss.write_index(indexes[s], str(index_paths[s]))
 
-            done = base + len(batch_chunks)
-            print(f"  - Added {done}/{len(chunks_to_add)} new chunks (total indexed: {index.ntotal})")
+            done = base + len(batch)
+            total = sum(ix.ntotal for ix in indexes)
+            print(f"  - Added {done}/{len(chunks_to_add)} new chunks (total indexed: {total})")
+    finally:
+        for f in f_jsonls:
+            f.close()
 
     print("\n[OK] Vector KB built/updated successfully.")
-    print(f"- index:  {index_path}")
-    print(f"- texts:  {jsonl_path}")
-    print(f"- total vectors: {index.ntotal}")
+    for ip, jp, ix in zip(index_paths, jsonl_paths, indexes):
+        print(f"- index:  {ip}  ({ix.ntotal} vectors)")
+        print(f"- texts:  {jp}")
+    print(f"- total vectors: {sum(ix.ntotal for ix in indexes)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,108 @@
+"""
+Export MiniLM and the emotion classifier to ONNX (fp32 + dynamic int8) and verify
+both against the PyTorch models.
+
+    python scripts/export_onnx.py              # export + verify
+    python scripts/export_onnx.py --verify-only
+
+Exit code is non-zero if any check is outside tolerance.
+"""
+from pathlib import Path
+import argparse
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import ONNX_MODEL_DIR
+from core.onnx_backend import (
+    EMBED_HF_NAME, EMBED_DIR_NAME,
+    EMOTION_HF_NAME, EMOTION_DIR_NAME,
+    OnnxSentenceEncoder, OnnxTextClassifier, export_model,
+)
+
+SAMPLES = [
+    "What is the difference between supervised and unsupervised learning?",
+    "Why does my model overfit when I add more layers?",
+    "I feel completely lost in this course and I'm scared I will fail.",
+    "Gradient descent updates parameters in the direction of the negative gradient.",
+    "I'm so happy, I finally understood backpropagation!",
+    "This is pointless. Nothing I do works and I'm angry at myself.",
+    "ok",
+]
+
+# fp32 export should match PyTorch to numerical noise; int8 is allowed to drift a little.
+TOL = {
+    "embed": {"fp32_min_cos": 0.9999, "int8_min_cos": 0.98},
+    "emotion": {"fp32_max_abs": 1e-3, "int8_max_abs": 0.08},
+}
+
+
+def verify_embedder(out_dir: Path) -> bool:
+    from sentence_transformers import SentenceTransformer
+
+    ref = SentenceTransformer("all-MiniLM-L6-v2", device="cpu").encode(SAMPLES, normalize_embeddings=True)
+    ok = True
+    for quantized, key in ((False, "fp32_min_cos"), (True, "int8_min_cos")):
+        enc = OnnxSentenceEncoder(out_dir, quantized=quantized)
+        got = enc.encode(SAMPLES)
+        cos = (ref * got).sum(axis=1)
+        passed = cos.min() >= TOL["embed"][key]
+        ok &= bool(passed)
+        tag = "int8" if quantized else "fp32"
+        print(f"[embed/{tag}] min cosine vs torch {cos.min():.5f} (mean {cos.mean():.5f})  "
+              f"{'OK' if passed else 'FAIL'} (>= {TOL['embed'][key]})")
+    return ok
+
+
+def verify_emotion(out_dir: Path) -> bool:
+    from transformers import pipeline
+
+    pipe = pipeline("text-classification", model=EMOTION_HF_NAME, return_all_scores=True, device=-1)
+
+    def as_matrix(results, labels):
+        return np.array([[{s["label"]: s["score"] for s in r}[l] for l in labels] for r in results])
+
+    ref_raw = [pipe(t)[0] for t in SAMPLES]
+    labels = [s["label"] for s in ref_raw[0]]
+    ref = as_matrix(ref_raw, labels)
+
+    ok = True
+    for quantized, key in ((False, "fp32_max_abs"), (True, "int8_max_abs")):
+        clf = OnnxTextClassifier(out_dir, quantized=quantized)
+        got = as_matrix([clf(t)[0] for t in SAMPLES], labels)
+        diff = np.abs(ref - got).max()
+        top1 = (ref.argmax(axis=1) == got.argmax(axis=1)).mean()
+        passed = diff <= TOL["emotion"][key] and top1 == 1.0
+        ok &= bool(passed)
+        tag = "int8" if quantized else "fp32"
+        print(f"[emotion/{tag}] max |p - p_torch| {diff:.4f}, top-1 agreement {top1:.0%}  "
+              f"{'OK' if passed else 'FAIL'} (<= {TOL['emotion'][key]})")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=ONNX_MODEL_DIR)
+    ap.add_argument("--verify-only", action="store_true")
+    args = ap.parse_args()
+
+    root = Path(args.out)
+    embed_dir = root / EMBED_DIR_NAME
+    emotion_dir = root / EMOTION_DIR_NAME
+
+    if not args.verify_only:
+        print(f"[1/2] Exporting {EMBED_HF_NAME} -> {embed_dir}")
+        print("      ", export_model(EMBED_HF_NAME, embed_dir, classifier=False))
+        print(f"[2/2] Exporting {EMOTION_HF_NAME} -> {emotion_dir}")
+        print("      ", export_model(EMOTION_HF_NAME, emotion_dir, classifier=True))
+
+    ok = verify_embedder(embed_dir)
+    ok &= verify_emotion(emotion_dir)
+    print("\n[OK] ONNX models match PyTorch within tolerance." if ok else "\n[FAIL] Tolerance check failed.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Reviewer CLI for the escalation queue.
+
+    python scripts/review_escalations.py list
+    python scripts/review_escalations.py claim --reviewer alice --limit 5
+    python scripts/review_escalations.py resolve 12 --reviewer alice --note "called student services"
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from safety.escalation import EscalationQueue
+from config import ESCALATION_DB
+
+
+def show(items):
+    for it in items:
+        print(f"#{it['id']}  risk={it['risk_score']:.2f} ({it['risk_level']})  "
+              f"session={it['session_id']}  status={it['status']}")
+        print("   " + json.dumps(it["payload"].get("user_input", ""), ensure_ascii=False))
+    if not items:
+        print("(nothing)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=ESCALATION_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("list")
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("claim")
+    p.add_argument("--reviewer", required=True)
+    p.add_argument("--limit", type=int, default=1)
+
+    p = sub.add_parser("resolve")
+    p.add_argument("id", type=int)
+    p.add_argument("--reviewer", required=True)
+    p.add_argument("--note", default="")
+
+    args = ap.parse_args()
+    # consumer only: no writer thread
+    q = EscalationQueue(args.db, start_writer=False)
+
+    if args.cmd == "list":
+        show(q.pending(limit=args.limit))
+    elif args.cmd == "claim":
+        show(q.claim(args.reviewer, limit=args.limit))
+    elif args.cmd == "resolve":
+        ok = q.resolve(args.id, args.reviewer, args.note)
+        print("resolved" if ok else "not found or already resolved")
+
+
+if __name__ == "__main__":
+    main()